@@ -1,27 +1,46 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, update, insert, tuple_
+from sqlalchemy.orm import Session, joinedload, load_only
 from app.models import Student, Trainer, Training, Attendance, Subscription, Payment, BeltExam
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Student columns shown in list views
+STUDENT_LIST_COLUMNS = (
+    Student.id, Student.first_name, Student.last_name, Student.phone,
+    Student.telegram_id, Student.current_belt, Student.registration_date
+)
+
+# Rows fetched from the cursor at a time when streaming list views
+STREAM_BATCH_SIZE = 500
+
 
 class DatabaseError(Exception):
     """Custom exception for database operations"""
     pass
 
-class StudentController:
-    """Controller for student management"""
+class BaseController:
+    """Base class for controllers sharing a database session"""
     
     def __init__(self, db_session: Session):
         self.db = db_session
     
+    def _save(self, commit: bool = True):
+        """Commit changes, or only flush them when the caller batches writes"""
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+
+class StudentController(BaseController):
+    """Controller for student management"""
+    
     def create_student(self, first_name: str, last_name: str, phone: str, 
                       telegram_id: str = None, email: str = None, 
-                      current_belt: str = "White", notes: str = None) -> Student:
+                      current_belt: str = "White", notes: str = None,
+                      commit: bool = True) -> Student:
         """Create a new student"""
         try:
             student = Student(
@@ -34,7 +53,7 @@ class StudentController:
                 notes=notes
             )
             self.db.add(student)
-            self.db.commit()
+            self._save(commit)
             logger.info(f"Created student: {student.first_name} {student.last_name}")
             return student
         except Exception as e:
@@ -44,15 +63,26 @@ class StudentController:
     
     def get_all_students(self) -> List[Student]:
         """Get all students"""
-        return self.db.query(Student).filter(Student.is_active == True).all()
+        return self.db.scalars(
+            select(Student).where(Student.is_active == True).options(
+                # Only the columns list views display
+                load_only(*STUDENT_LIST_COLUMNS)
+            )
+        ).all()
+    
+    def iter_student_rows(self) -> Iterator[tuple]:
+        """Stream active students as plain rows of STUDENT_LIST_COLUMNS, STREAM_BATCH_SIZE rows per fetch"""
+        return iter(self.db.execute(
+            select(*STUDENT_LIST_COLUMNS).where(Student.is_active == True)
+        ).yield_per(STREAM_BATCH_SIZE))
     
     def get_student_by_id(self, student_id: int) -> Optional[Student]:
         """Get student by ID"""
-        return self.db.query(Student).filter(Student.id == student_id).first()
+        return self.db.get(Student, student_id)
     
     def get_student_by_phone(self, phone: str) -> Optional[Student]:
         """Get student by phone number"""
-        return self.db.query(Student).filter(Student.phone == phone).first()
+        return self.db.scalars(select(Student).where(Student.phone == phone)).first()
     
     def update_student(self, student_id: int, **kwargs) -> Optional[Student]:
         """Update student information"""
@@ -86,29 +116,35 @@ class StudentController:
             logger.error(f"Failed to deactivate student {student_id}: {e}")
             raise DatabaseError(f"Failed to deactivate student: {e}")
     
+    def count_active_students(self) -> int:
+        """Get number of active students"""
+        return self.db.scalar(select(func.count()).select_from(Student).where(Student.is_active == True))
+    
     def get_student_attendance_count(self, student_id: int) -> int:
         """Get total attendance count for student"""
-        return self.db.query(Attendance).filter(
-            Attendance.student_id == student_id,
-            Attendance.status == "Present"
-        ).count()
+        return self.db.scalar(
+            select(func.count()).select_from(Attendance).where(
+                Attendance.student_id == student_id,
+                Attendance.status == "Present"
+            )
+        )
     
     def get_student_missed_classes(self, student_id: int, days: int = 30) -> int:
         """Get missed classes count for student in last N days"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        return self.db.query(Attendance).join(Training).filter(
-            Attendance.student_id == student_id,
-            Attendance.status == "Absent",
-            Training.date >= cutoff_date
-        ).count()
+        return self.db.scalar(
+            select(func.count()).select_from(Attendance).join(Training).where(
+                Attendance.student_id == student_id,
+                Attendance.status == "Absent",
+                Training.date >= cutoff_date
+            )
+        )
 
-class TrainingController:
+class TrainingController(BaseController):
     """Controller for training management"""
     
-    def __init__(self, db_session: Session):
-        self.db = db_session
-    
-    def create_training(self, date: datetime, trainer_id: int, notes: str = None) -> Training:
+    def create_training(self, date: datetime, trainer_id: int, notes: str = None,
+                        commit: bool = True) -> Training:
         """Create a new training session"""
         training = Training(
             date=date,
@@ -116,29 +152,63 @@ class TrainingController:
             notes=notes
         )
         self.db.add(training)
-        self.db.commit()
+        self._save(commit)
         return training
     
-    def get_all_trainings(self) -> List[Training]:
-        """Get all trainings"""
-        return self.db.query(Training).order_by(Training.date.desc()).all()
+    def get_all_trainings(self, limit: Optional[int] = None,
+                          before: Optional[Tuple[datetime, int]] = None) -> List[Training]:
+        """Get trainings newest first; all of them, or pages of `limit` after the (date, id) `before` key"""
+        # notes is shown in the trainings list, so it is not deferred here
+        stmt = select(Training).options(joinedload(Training.trainer)).order_by(
+            Training.date.desc(), Training.id.desc()
+        ).limit(limit)
+        if before is not None:
+            # The id breaks ties, so trainings sharing the last row's date are not skipped
+            stmt = stmt.where(tuple_(Training.date, Training.id) < tuple_(*before))
+        return self.db.scalars(stmt).all()
+    
+    def count_trainings(self) -> int:
+        """Get number of trainings"""
+        return self.db.scalar(select(func.count()).select_from(Training))
+    
+    def get_training_rows(self, limit: Optional[int] = None,
+                          before: Optional[Tuple[datetime, int]] = None) -> List[tuple]:
+        """Get trainings newest first as (id, date, trainer first/last name, attendance count, notes) rows"""
+        stmt = (
+            select(Training.id, Training.date, Trainer.first_name, Trainer.last_name,
+                   func.count(Attendance.id), Training.notes)
+            .outerjoin(Training.trainer)
+            .outerjoin(Training.attendances)
+            .group_by(Training.id, Trainer.id)
+            .order_by(Training.date.desc(), Training.id.desc())
+            .limit(limit)
+        )
+        if before is not None:
+            # The id breaks ties, so trainings sharing the last row's date are not skipped
+            stmt = stmt.where(tuple_(Training.date, Training.id) < tuple_(*before))
+        return self.db.execute(stmt).all()
     
     def get_trainings_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Training]:
         """Get trainings in date range"""
-        return self.db.query(Training).filter(
-            Training.date >= start_date,
-            Training.date <= end_date
-        ).order_by(Training.date).all()
+        return self.db.scalars(
+            select(Training).where(
+                Training.date >= start_date,
+                Training.date <= end_date
+            ).order_by(Training.date)
+        ).all()
     
     def get_upcoming_trainings(self, days: int = 7) -> List[Training]:
         """Get upcoming trainings in next N days"""
         cutoff_date = datetime.utcnow() + timedelta(days=days)
-        return self.db.query(Training).filter(
-            Training.date >= datetime.utcnow(),
-            Training.date <= cutoff_date
-        ).order_by(Training.date).all()
+        return self.db.scalars(
+            select(Training).where(
+                Training.date >= datetime.utcnow(),
+                Training.date <= cutoff_date
+            ).order_by(Training.date)
+        ).all()
     
-    def mark_attendance(self, training_id: int, student_id: int, status: str = "Present", notes: str = None) -> Attendance:
+    def mark_attendance(self, training_id: int, student_id: int, status: str = "Present", notes: str = None,
+                        commit: bool = True) -> Attendance:
         """Mark student attendance for training"""
         attendance = Attendance(
             training_id=training_id,
@@ -147,17 +217,31 @@ class TrainingController:
             notes=notes
         )
         self.db.add(attendance)
-        self.db.commit()
+        self._save(commit)
         return attendance
+    
+    def bulk_mark_attendance(self, training_id: int, entries: List[Dict[str, Any]], commit: bool = True) -> int:
+        """Mark attendance for a training from dicts with student_id and optional status and notes"""
+        rows = [
+            {
+                'training_id': training_id,
+                'student_id': entry['student_id'],
+                'status': entry.get('status', "Present"),
+                'notes': entry.get('notes'),
+            }
+            for entry in entries
+        ]
+        if rows:
+            # Executemany without building Attendance objects or tracking them in the session
+            self.db.execute(insert(Attendance), rows)
+            self._save(commit)
+        return len(rows)
 
-class PaymentController:
+class PaymentController(BaseController):
     """Controller for payment management"""
     
-    def __init__(self, db_session: Session):
-        self.db = db_session
-    
     def create_payment(self, student_id: int, amount: float, payment_type: str, 
-                      description: str = None) -> Payment:
+                      description: str = None, commit: bool = True) -> Payment:
         """Create a new payment record"""
         payment = Payment(
             student_id=student_id,
@@ -166,11 +250,11 @@ class PaymentController:
             description=description
         )
         self.db.add(payment)
-        self.db.commit()
+        self._save(commit)
         return payment
     
     def create_subscription(self, student_id: int, subscription_type: str, 
-                           start_date: datetime, price: float) -> Subscription:
+                           start_date: datetime, price: float, commit: bool = True) -> Subscription:
         """Create a new subscription"""
         end_date = None
         if subscription_type == "Monthly":
@@ -184,36 +268,57 @@ class PaymentController:
             price=price
         )
         self.db.add(subscription)
-        self.db.commit()
+        self._save(commit)
         return subscription
     
-    def get_student_payments(self, student_id: int) -> List[Payment]:
-        """Get all payments for student"""
-        return self.db.query(Payment).filter(Payment.student_id == student_id).order_by(Payment.payment_date.desc()).all()
+    def get_student_payments(self, student_id: int, limit: Optional[int] = None,
+                             before: Optional[Tuple[datetime, int]] = None) -> List[Payment]:
+        """Get student payments newest first; all of them, or pages of `limit` after the (date, id) `before` key"""
+        stmt = (
+            select(Payment).options(joinedload(Payment.student))
+            .where(Payment.student_id == student_id)
+            .order_by(Payment.payment_date.desc(), Payment.id.desc())
+            .limit(limit)
+        )
+        if before is not None:
+            # The id breaks ties, so payments sharing the last row's date are not skipped
+            stmt = stmt.where(tuple_(Payment.payment_date, Payment.id) < tuple_(*before))
+        return self.db.scalars(stmt).all()
+    
+    def iter_payment_rows(self) -> Iterator[tuple]:
+        """Stream payments as (id, first_name, last_name, amount, payment_type, payment_date, description) rows"""
+        return iter(self.db.execute(
+            select(Payment.id, Student.first_name, Student.last_name, Payment.amount,
+                   Payment.payment_type, Payment.payment_date, Payment.description)
+            .join(Student, Payment.student_id == Student.id)
+        ).yield_per(STREAM_BATCH_SIZE))
     
     def get_monthly_revenue(self, year: int, month: int) -> float:
         """Get monthly revenue"""
-        payments = self.db.query(Payment).filter(
-            Payment.payment_date.year == year,
-            Payment.payment_date.month == month
-        ).all()
-        return sum(payment.amount for payment in payments)
+        start_date = datetime(year, month, 1)
+        end_date = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        return self.db.scalar(
+            select(func.coalesce(func.sum(Payment.amount), 0.0)).where(
+                Payment.payment_date >= start_date,
+                Payment.payment_date < end_date
+            )
+        )
     
     def get_active_subscriptions(self) -> List[Subscription]:
         """Get all active subscriptions"""
-        return self.db.query(Subscription).filter(
-            Subscription.is_active == True,
-            Subscription.end_date >= datetime.utcnow()
+        return self.db.scalars(
+            select(Subscription).where(
+                Subscription.is_active == True,
+                Subscription.end_date >= datetime.utcnow()
+            )
         ).all()
 
-class BeltExamController:
+class BeltExamController(BaseController):
     """Controller for belt exam management"""
     
-    def __init__(self, db_session: Session):
-        self.db = db_session
-    
     def create_belt_exam(self, student_id: int, belt_color: str, 
-                        exam_date: datetime, result: str, notes: str = None) -> BeltExam:
+                        exam_date: datetime, result: str, notes: str = None,
+                        commit: bool = True) -> BeltExam:
         """Create a new belt exam record"""
         exam = BeltExam(
             student_id=student_id,
@@ -223,25 +328,28 @@ class BeltExamController:
             notes=notes
         )
         self.db.add(exam)
-        self.db.commit()
         
-        # Update student's belt if exam passed
+        # Update student's belt if exam passed, in the same transaction
         if result == "Pass":
-            student = self.db.query(Student).filter(Student.id == student_id).first()
-            if student:
-                student.current_belt = belt_color
-                self.db.commit()
+            self.db.execute(
+                update(Student).where(Student.id == student_id).values(current_belt=belt_color)
+            )
+        self._save(commit)
         
         return exam
     
     def get_student_exams(self, student_id: int) -> List[BeltExam]:
         """Get all exams for student"""
-        return self.db.query(BeltExam).filter(BeltExam.student_id == student_id).order_by(BeltExam.exam_date.desc()).all()
+        return self.db.scalars(
+            select(BeltExam).where(BeltExam.student_id == student_id).order_by(BeltExam.exam_date.desc())
+        ).all()
     
     def get_upcoming_exams(self, days: int = 30) -> List[BeltExam]:
         """Get upcoming exams in next N days"""
         cutoff_date = datetime.utcnow() + timedelta(days=days)
-        return self.db.query(BeltExam).filter(
-            BeltExam.exam_date >= datetime.utcnow(),
-            BeltExam.exam_date <= cutoff_date
-        ).order_by(BeltExam.exam_date).all()
+        return self.db.scalars(
+            select(BeltExam).options(joinedload(BeltExam.student)).where(
+                BeltExam.exam_date >= datetime.utcnow(),
+                BeltExam.exam_date <= cutoff_date
+            ).order_by(BeltExam.exam_date)
+        ).all()
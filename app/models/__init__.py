@@ -1,13 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Float, Text, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
 
 Base = declarative_base()
 
 class Student(Base):
     """Модель ученика"""
     __tablename__ = 'students'
+    # Read the database timestamp back at flush, so detached students still have it
+    __mapper_args__ = {'eager_defaults': True}
     
     id = Column(Integer, primary_key=True)
     first_name = Column(String(50), nullable=False)
@@ -16,8 +17,9 @@ class Student(Base):
     telegram_id = Column(String(50), unique=True)
     email = Column(String(100))
     current_belt = Column(String(20), default='White')  # White, Blue, Purple, Brown, Black
-    registration_date = Column(DateTime, default=datetime.utcnow)
-    is_active = Column(Boolean, default=True)
+    # Timestamped by the database in the INSERT itself, also for tables created before server_default
+    registration_date = Column(DateTime, default=func.now(), server_default=func.now())
+    is_active = Column(Boolean, default=True, index=True)
     notes = Column(Text)
     
     # Relationships
@@ -52,7 +54,7 @@ class Training(Base):
     __tablename__ = 'trainings'
     
     id = Column(Integer, primary_key=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     trainer_id = Column(Integer, ForeignKey('trainers.id'), nullable=False)
     notes = Column(Text)
     
@@ -66,16 +68,20 @@ class Training(Base):
 class Attendance(Base):
     """Модель посещаемости"""
     __tablename__ = 'attendances'
+    __table_args__ = (
+        # Student's attendance lookups; the leading column also serves student-only filters
+        Index('ix_attendances_student_training', 'student_id', 'training_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
-    training_id = Column(Integer, ForeignKey('trainings.id'), nullable=False)
-    status = Column(String(20), default='Present')  # Present, Absent, Late
+    training_id = Column(Integer, ForeignKey('trainings.id'), nullable=False, index=True)
+    status = Column(String(20), default='Present', index=True)  # Present, Absent, Late
     notes = Column(Text)
     
     # Relationships
-    student = relationship("Student", back_populates="attendances")
-    training = relationship("Training", back_populates="attendances")
+    student = relationship("Student", back_populates="attendances", lazy="selectin")
+    training = relationship("Training", back_populates="attendances", lazy="joined")
     
     def __repr__(self):
         return f"<Attendance({self.student_id}, {self.training_id})>"
@@ -83,9 +89,13 @@ class Attendance(Base):
 class Subscription(Base):
     """Модель подписки"""
     __tablename__ = 'subscriptions'
+    __table_args__ = (
+        # Active subscriptions that have not ended yet
+        Index('ix_subscriptions_active_end_date', 'is_active', 'end_date'),
+    )
     
     id = Column(Integer, primary_key=True)
-    student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
+    student_id = Column(Integer, ForeignKey('students.id'), nullable=False, index=True)
     subscription_type = Column(String(20), nullable=False)  # Monthly, Single
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime)
@@ -101,16 +111,21 @@ class Subscription(Base):
 class Payment(Base):
     """Модель платежа"""
     __tablename__ = 'payments'
+    __table_args__ = (
+        # Student's payments, newest first
+        Index('ix_payments_student_date', 'student_id', 'payment_date'),
+    )
+    __mapper_args__ = {'eager_defaults': True}
     
     id = Column(Integer, primary_key=True)
     student_id = Column(Integer, ForeignKey('students.id'), nullable=False)
     amount = Column(Float, nullable=False)
-    payment_date = Column(DateTime, default=datetime.utcnow)
+    payment_date = Column(DateTime, default=func.now(), server_default=func.now(), index=True)
     payment_type = Column(String(20), nullable=False)  # Monthly, Single, Exam
     description = Column(Text)
     
     # Relationships
-    student = relationship("Student", back_populates="payments")
+    student = relationship("Student", back_populates="payments", lazy="joined")
     
     def __repr__(self):
         return f"<Payment({self.amount}, {self.student_id})>"
@@ -127,7 +142,7 @@ class BeltExam(Base):
     notes = Column(Text)
     
     # Relationships
-    student = relationship("Student", back_populates="belt_exams")
+    student = relationship("Student", back_populates="belt_exams", lazy="joined")
     
     def __repr__(self):
         return f"<BeltExam({self.belt_color}, {self.student_id})>"
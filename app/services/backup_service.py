@@ -4,16 +4,88 @@ Backup Service for BJJ CRM System
 Handles database and file backups
 """
 
+import hashlib
+import mmap
 import os
 import shutil
 import sqlite3
 import subprocess
 import tarfile
+import tempfile
+import threading
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
 import json
 
+# Buffer for userspace file copies: the sendfile fallback and the files archive
+COPY_BUFFER_SIZE = 2 * 1024 * 1024
+
+# gzip level for the files archive; 9 costs far more CPU for a few percent smaller output
+ARCHIVE_COMPRESSLEVEL = 6
+
+# Metadata of all backups in one file, so listing does not parse every metadata JSON
+INDEX_FILE_NAME = "backups.index.json"
+
+# Serializes index read-modify-write cycles; backups run on a worker pool and may overlap
+_INDEX_LOCK = threading.RLock()
+
+
+def _copy_file(src: str, dst: str):
+    """Copy a file with os.sendfile in the kernel, keeping its metadata like shutil.copy2"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        offset = 0
+        try:
+            in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+            size = os.fstat(in_fd).st_size
+            while offset < size:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            # No sendfile on this platform or filesystem: copy the rest in large blocks
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+    shutil.copystat(src, dst)
+
+
+def _copy_database(src: str, dst: str):
+    """Copy a SQLite database with the online backup API, falling back to a file copy"""
+    try:
+        # mode=rw fails on a missing source instead of creating an empty database
+        with closing(sqlite3.connect(f"{Path(src).resolve().as_uri()}?mode=rw", uri=True)) as source, \
+                closing(sqlite3.connect(dst)) as target:
+            # A consistent snapshot including committed WAL pages, taken while the app keeps writing
+            source.backup(target)
+    except sqlite3.Error:
+        _copy_file(src, dst)
+
+
+def _safe_size(path: Optional[str]) -> Optional[int]:
+    """Size of a file from a single stat call, or None if it cannot be read"""
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def _checksum(path: str) -> str:
+    """SHA-256 of a file, hashed in C without a Python read loop"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        # Before Python 3.11: hand the whole mapped file to OpenSSL in one call
+        digest = hashlib.sha256()
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        return digest.hexdigest()
+
 
 class BackupService:
     """Service for handling backups and restores"""
@@ -22,6 +94,7 @@ class BackupService:
         self.app_dir = app_dir or os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.backup_dir = os.path.join(self.app_dir, "backups")
         self.db_path = os.path.join(self.app_dir, "bjj_crm.db")
+        self.index_path = os.path.join(self.backup_dir, INDEX_FILE_NAME)
         
         # Create backup directory if it doesn't exist
         os.makedirs(self.backup_dir, exist_ok=True)
@@ -53,12 +126,14 @@ class BackupService:
         try:
             # Backup database
             db_backup_path = os.path.join(self.backup_dir, f"bjj_crm_{timestamp}.db")
-            shutil.copy2(self.db_path, db_backup_path)
+            _copy_database(self.db_path, db_backup_path)
             backup_info['db_file'] = db_backup_path
             
             # Get database file size
-            if os.path.exists(db_backup_path):
-                backup_info['file_sizes']['database'] = os.path.getsize(db_backup_path)
+            db_size = _safe_size(db_backup_path)
+            if db_size is not None:
+                backup_info['file_sizes']['database'] = db_size
+                backup_info['checksums']['database'] = _checksum(db_backup_path)
             
             # Backup application files if requested
             if include_files:
@@ -67,13 +142,22 @@ class BackupService:
                 backup_info['files_file'] = files_backup_path
                 
                 # Get files archive size
-                if os.path.exists(files_backup_path):
-                    backup_info['file_sizes']['files'] = os.path.getsize(files_backup_path)
+                files_size = _safe_size(files_backup_path)
+                if files_size is not None:
+                    backup_info['file_sizes']['files'] = files_size
+                    backup_info['checksums']['files'] = _checksum(files_backup_path)
             
-            # Create backup metadata
+            # Create backup metadata; the index is read first so a rebuild does not pick up this backup twice
             metadata_path = os.path.join(self.backup_dir, f"backup_metadata_{timestamp}.json")
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(backup_info, f, ensure_ascii=False, indent=2)
+            with _INDEX_LOCK:
+                backups = self._load_index()
+                with open(metadata_path, 'w', encoding='utf-8') as f:
+                    json.dump(backup_info, f, ensure_ascii=False, indent=2)
+                
+                # Backups started within the same second share the metadata file, so keep one entry for it
+                backups = [backup for backup in backups if backup.get('metadata_file') != metadata_path]
+                backups.append(dict(backup_info, metadata_file=metadata_path))
+                self._write_index(backups)
             
             return backup_info
             
@@ -82,22 +166,48 @@ class BackupService:
     
     def _create_files_backup(self, backup_path: str):
         """Create tar.gz backup of application files"""
-        with tarfile.open(backup_path, "w:gz") as tar:
-            # Add main application files
-            files_to_backup = [
-                "main.py",
-                "requirements.txt",
-                ".env",
-                "app/",
-                "database/",
-                "scripts/",
-                "docs/"
-            ]
-            
-            for file_path in files_to_backup:
-                full_path = os.path.join(self.app_dir, file_path)
-                if os.path.exists(full_path):
-                    tar.add(full_path, arcname=file_path)
+        pigz = shutil.which("pigz")
+        if pigz:
+            self._create_files_backup_pigz(pigz, backup_path)
+            return
+        
+        # Large buffers for both the member copies and the compressed output writes
+        with open(backup_path, 'wb', buffering=COPY_BUFFER_SIZE) as archive, \
+                tarfile.open(fileobj=archive, mode="w:gz", compresslevel=ARCHIVE_COMPRESSLEVEL,
+                             copybufsize=COPY_BUFFER_SIZE) as tar:
+            self._add_app_files(tar)
+    
+    def _create_files_backup_pigz(self, pigz: str, backup_path: str):
+        """Create tar.gz backup of application files, compressed by pigz on all cores"""
+        with open(backup_path, 'wb') as archive:
+            process = subprocess.Popen([pigz, f"-{ARCHIVE_COMPRESSLEVEL}", "-c"],
+                                       stdin=subprocess.PIPE, stdout=archive)
+            try:
+                with tarfile.open(fileobj=process.stdin, mode="w|", bufsize=COPY_BUFFER_SIZE,
+                                  copybufsize=COPY_BUFFER_SIZE) as tar:
+                    self._add_app_files(tar)
+            finally:
+                process.stdin.close()
+                returncode = process.wait()
+        if returncode != 0:
+            raise Exception(f"pigz завершился с кодом {returncode}")
+    
+    def _add_app_files(self, tar: tarfile.TarFile):
+        """Add main application files to an open archive"""
+        files_to_backup = [
+            "main.py",
+            "requirements.txt",
+            ".env",
+            "app/",
+            "database/",
+            "scripts/",
+            "docs/"
+        ]
+        
+        for file_path in files_to_backup:
+            full_path = os.path.join(self.app_dir, file_path)
+            if os.path.exists(full_path):
+                tar.add(full_path, arcname=file_path)
     
     def list_backups(self) -> List[Dict[str, str]]:
         """
@@ -106,19 +216,9 @@ class BackupService:
         Returns:
             List of backup info dictionaries
         """
-        backups = []
-        
         try:
-            for file_name in os.listdir(self.backup_dir):
-                if file_name.startswith("backup_metadata_") and file_name.endswith(".json"):
-                    metadata_path = os.path.join(self.backup_dir, file_name)
-                    try:
-                        with open(metadata_path, 'r', encoding='utf-8') as f:
-                            backup_info = json.load(f)
-                            backup_info['metadata_file'] = metadata_path
-                            backups.append(backup_info)
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
+            with _INDEX_LOCK:
+                backups = self._load_index()
             
             # Sort by timestamp (newest first)
             backups.sort(key=lambda x: x['timestamp'], reverse=True)
@@ -127,6 +227,42 @@ class BackupService:
         except Exception as e:
             raise Exception(f"Ошибка получения списка бэкапов: {str(e)}")
     
+    def _load_index(self) -> List[Dict[str, str]]:
+        """Read the backup index, rebuilding it from the metadata files if it is missing or corrupt"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                backups = json.load(f)
+            if isinstance(backups, list):
+                return backups
+        except (json.JSONDecodeError, FileNotFoundError):
+            pass
+        return self._rebuild_index()
+    
+    def _rebuild_index(self) -> List[Dict[str, str]]:
+        """Collect every backup metadata file into a new index"""
+        backups = []
+        with os.scandir(self.backup_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith("backup_metadata_") and entry.name.endswith(".json"):
+                    try:
+                        with open(entry.path, 'r', encoding='utf-8') as f:
+                            backup_info = json.load(f)
+                            backup_info['metadata_file'] = entry.path
+                            backups.append(backup_info)
+                    except (json.JSONDecodeError, FileNotFoundError):
+                        continue
+        
+        self._write_index(backups)
+        return backups
+    
+    def _write_index(self, backups: List[Dict[str, str]]):
+        """Replace the backup index in one step, so readers never see a partly written file"""
+        # Each writer gets its own temporary file next to the index
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.backup_dir,
+                                         suffix=".tmp", delete=False) as f:
+            json.dump(backups, f, ensure_ascii=False)
+        os.replace(f.name, self.index_path)
+    
     def restore_backup(self, backup_info: Dict[str, str], restore_files: bool = False) -> bool:
         """
         Restore from backup
@@ -143,10 +279,10 @@ class BackupService:
             if backup_info.get('db_file') and os.path.exists(backup_info['db_file']):
                 # Create backup of current database
                 current_backup = f"{self.db_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                shutil.copy2(self.db_path, current_backup)
+                _copy_database(self.db_path, current_backup)
                 
-                # Restore database
-                shutil.copy2(backup_info['db_file'], self.db_path)
+                # Restore database; written through SQLite so an open WAL cannot replay over it
+                _copy_database(backup_info['db_file'], self.db_path)
             
             # Restore files if requested
             if restore_files and backup_info.get('files_file') and os.path.exists(backup_info['files_file']):
@@ -159,7 +295,8 @@ class BackupService:
     
     def _restore_files_backup(self, backup_path: str):
         """Restore files from tar.gz backup"""
-        with tarfile.open(backup_path, "r:gz") as tar:
+        with open(backup_path, 'rb', buffering=COPY_BUFFER_SIZE) as archive, \
+                tarfile.open(fileobj=archive, mode="r:gz", copybufsize=COPY_BUFFER_SIZE) as tar:
             tar.extractall(path=self.app_dir)
     
     def delete_backup(self, backup_info: Dict[str, str]) -> bool:
@@ -183,6 +320,12 @@ class BackupService:
                 if file_path and os.path.exists(file_path):
                     os.remove(file_path)
             
+            with _INDEX_LOCK:
+                self._write_index([
+                    backup for backup in self._load_index()
+                    if backup.get('metadata_file') != backup_info.get('metadata_file')
+                ])
+            
             return True
             
         except Exception as e:
@@ -198,19 +341,13 @@ class BackupService:
         Returns:
             Total size in bytes
         """
-        total_size = 0
-        
         files_to_check = [
             backup_info.get('db_file'),
             backup_info.get('files_file'),
             backup_info.get('metadata_file')
         ]
         
-        for file_path in files_to_check:
-            if file_path and os.path.exists(file_path):
-                total_size += os.path.getsize(file_path)
-        
-        return total_size
+        return sum(size for size in map(_safe_size, files_to_check) if size is not None)
     
     def cleanup_old_backups(self, keep_days: int = 7) -> int:
         """
@@ -226,11 +363,18 @@ class BackupService:
         cutoff_time = datetime.now().timestamp() - (keep_days * 24 * 3600)
         
         try:
-            for file_name in os.listdir(self.backup_dir):
-                file_path = os.path.join(self.backup_dir, file_name)
-                if os.path.getmtime(file_path) < cutoff_time:
-                    os.remove(file_path)
-                    deleted_count += 1
+            # scandir hands back joined paths and the entry type without an extra stat per file
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    if entry.name == INDEX_FILE_NAME or not entry.is_file(follow_symlinks=False):
+                        continue
+                    if entry.stat().st_mtime < cutoff_time:
+                        os.remove(entry.path)
+                        deleted_count += 1
+            
+            if deleted_count:
+                with _INDEX_LOCK:
+                    self._rebuild_index()
             
             return deleted_count
             
@@ -8,7 +8,11 @@ import tkinter as tk
 from tkinter import ttk
 import csv
 import io
-from typing import List, Dict, Any, Optional
+import weakref
+from typing import List, Dict, Any, Optional, Tuple
+
+# Anonymous Tcl function (for `apply`) that inserts a list of rows into a treeview
+INSERT_ROWS_LAMBDA = "{tree rows} { foreach row $rows { $tree insert {} end -values $row } }"
 
 
 class ClipboardService:
@@ -16,6 +20,17 @@ class ClipboardService:
     
     def __init__(self, root: tk.Tk):
         self.root = root
+        # (columns, headers) per treeview, dropped with the widget
+        self._header_cache = weakref.WeakKeyDictionary()
+    
+    def _headers(self, treeview: ttk.Treeview) -> Tuple[tuple, List[str]]:
+        """Get column ids and heading texts, reading the headings again only when the columns change"""
+        columns = treeview['columns']
+        cached = self._header_cache.get(treeview)
+        if cached is None or cached[0] != columns:
+            cached = (columns, [treeview.heading(col, 'text') for col in columns])
+            self._header_cache[treeview] = cached
+        return cached
     
     def copy_table_to_clipboard(self, treeview: ttk.Treeview, include_headers: bool = True) -> bool:
         """
@@ -30,11 +45,7 @@ class ClipboardService:
         """
         try:
             # Get column headers
-            columns = treeview['columns']
-            headers = []
-            for col in columns:
-                header = treeview.heading(col)['text']
-                headers.append(header)
+            _, headers = self._headers(treeview)
             
             # Get selected items or all items
             selection = treeview.selection()
@@ -43,23 +54,18 @@ class ClipboardService:
             else:
                 items = treeview.get_children()
             
-            # Prepare data
-            clipboard_data = []
-            
-            # Add headers if requested
+            # Write tab-separated rows in C; values with tabs, newlines or quotes are quoted as spreadsheets expect
+            output = io.StringIO()
+            writer = csv.writer(output, delimiter='\t', lineterminator='\n')
             if include_headers:
-                clipboard_data.append('\t'.join(headers))
+                writer.writerow(headers)
             
-            # Add data rows
-            for item in items:
-                values = treeview.item(item)['values']
-                if values:
-                    # Convert all values to strings and join with tabs
-                    row_data = '\t'.join(str(value) for value in values)
-                    clipboard_data.append(row_data)
+            # Add data rows; asking for 'values' alone returns them as stored, without building the item dict
+            rows = (treeview.item(item, 'values') for item in items)
+            writer.writerows(values for values in rows if values)
             
-            # Copy to clipboard
-            clipboard_text = '\n'.join(clipboard_data)
+            # Copy to clipboard, without the final line break
+            clipboard_text = output.getvalue()[:-1]
             self.root.clipboard_clear()
             self.root.clipboard_append(clipboard_text)
             
@@ -170,17 +176,9 @@ class ClipboardService:
             # Get clipboard content
             clipboard_content = self.root.clipboard_get()
             
-            # Parse clipboard data
-            lines = clipboard_content.strip().split('\n')
-            if not lines:
-                return False
-            
-            # Parse as tab-separated values
-            parsed_data = []
-            for line in lines:
-                if line.strip():
-                    row_data = line.split('\t')
-                    parsed_data.append(row_data)
+            # Parse as tab-separated values, reading back the quoting written by copy_table_to_clipboard
+            reader = csv.reader(io.StringIO(clipboard_content.strip('\r\n')), delimiter='\t')
+            parsed_data = [row_data for row_data in reader if ''.join(row_data).strip()]
             
             # Call callback function with parsed data
             if callback_func:
@@ -207,26 +205,29 @@ class ClipboardService:
             treeview: Treeview widget
             rows_data: List of row data (each row is a list of values)
         """
-        # Get existing IDs to avoid duplicates
-        existing_ids = set()
+        # Find the next available ID in one pass over the existing rows
+        next_id = max(self._row_ids(treeview), default=0) + 1
+        
+        # Replace the first column (ID) of each non-empty row with a unique ID
+        new_rows = [
+            [str(row_id)] + row_data[1:]
+            for row_id, row_data in enumerate((row for row in rows_data if row), next_id)
+        ]
+        
+        # Insert all rows in one Tcl call; rows go in as a Tcl list, so values are never evaluated as script
+        if new_rows:
+            treeview.tk.call('apply', INSERT_ROWS_LAMBDA, str(treeview), new_rows)
+    
+    @staticmethod
+    def _row_ids(treeview: ttk.Treeview):
+        """Yield the numeric IDs in the first column of the treeview rows"""
         for child in treeview.get_children():
-            values = treeview.item(child)['values']
-            if values and len(values) > 0:
+            values = treeview.item(child, 'values')
+            if values:
                 try:
-                    existing_ids.add(int(values[0]))
-                except (ValueError, IndexError):
+                    yield int(values[0])
+                except ValueError:
                     pass
-        
-        # Find the next available ID
-        next_id = max(existing_ids) + 1 if existing_ids else 1
-        
-        # Add rows with unique IDs
-        for row_data in rows_data:
-            if row_data:  # Skip empty rows
-                # Generate unique ID for this row
-                new_row_data = [str(next_id)] + row_data[1:]  # Replace first column (ID) with unique ID
-                treeview.insert('', 'end', values=new_row_data)
-                next_id += 1
     
     def copy_csv_to_clipboard(self, data: List[List[str]], headers: Optional[List[str]] = None) -> bool:
         """
@@ -5,36 +5,59 @@ Handles importing student data from CSV files
 """
 
 import csv
+import io
 import os
 import sys
-from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import logging
-import chardet
+from chardet.universaldetector import UniversalDetector
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from database.connection import SessionLocal
 from app.models import Student
-from app.controllers import StudentController
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Dialect INSERT constructs that support ON CONFLICT DO NOTHING
+CONFLICT_INSERTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
+
 logger = logging.getLogger(__name__)
 
 
 class CSVImportService:
     """Service for importing student data from CSV files"""
     
+    # Number of rows sent to the database in one INSERT
+    BATCH_SIZE = 1000
+    # Number of phones per duplicate lookup (stays under SQLite's bind limit)
+    LOOKUP_SIZE = 500
+    # Read buffer for streaming large files
+    READ_BUFFER_SIZE = 1024 * 1024
+    # Characters read to detect the delimiter
+    SNIFF_SIZE = 8192
+    
     def __init__(self):
         self.db = SessionLocal()
-        self.student_controller = StudentController(self.db)
+        # Detected encodings and validation results keyed by (path, mtime, size)
+        self._encoding_cache = {}
+        self._validation_cache = {}
     
     def close(self):
         """Close database session"""
         self.db.close()
     
+    def _file_key(self, file_path: str) -> Tuple[str, int, int]:
+        """Cache key that changes whenever the file is modified"""
+        file_stat = os.stat(file_path)
+        return (file_path, file_stat.st_mtime_ns, file_stat.st_size)
+    
     def detect_encoding(self, file_path: str) -> str:
         """
         Detect file encoding
@@ -45,10 +68,33 @@ class CSVImportService:
         Returns:
             Detected encoding
         """
+        try:
+            cache_key = self._file_key(file_path)
+        except OSError as e:
+            logger.error(f"Error detecting encoding: {e}")
+            return 'utf-8'
+        
+        encoding = self._encoding_cache.get(cache_key)
+        if encoding is None:
+            encoding = self._detect_encoding(file_path)
+            self._encoding_cache[cache_key] = encoding
+        return encoding
+    
+    def _detect_encoding(self, file_path: str) -> str:
+        """Detect file encoding by sampling the start of the file"""
         try:
             with open(file_path, 'rb') as f:
-                raw_data = f.read(10000)  # Read first 10KB
-                result = chardet.detect(raw_data)
+                # Feed up to 10KB in 1KB chunks, stopping once the detector is sure
+                detector = UniversalDetector()
+                for _ in range(10):
+                    chunk = f.read(1024)
+                    if not chunk:
+                        break
+                    detector.feed(chunk)
+                    if detector.done:
+                        break
+                detector.close()
+                result = detector.result
                 encoding = result['encoding']
                 confidence = result['confidence']
                 
@@ -81,14 +127,33 @@ class CSVImportService:
         Returns:
             Dict with validation results
         """
+        try:
+            cache_key = self._file_key(file_path)
+        except OSError as e:
+            return {
+                'valid': False,
+                'error': f'Ошибка чтения файла: {str(e)}'
+            }
+        
+        validation = self._validation_cache.get(cache_key)
+        if validation is None:
+            validation = self._validate_csv_format(file_path)
+            if validation['valid']:
+                self._validation_cache[cache_key] = validation
+        return dict(validation)
+    
+    def _validate_csv_format(self, file_path: str) -> Dict[str, Any]:
+        """Validate CSV file format without consulting the cache"""
         try:
             # Detect file encoding
             encoding = self.detect_encoding(file_path)
             logger.info(f"Using encoding: {encoding}")
             
-            with open(file_path, 'r', encoding=encoding) as csvfile:
-                # Try to detect delimiter
-                sample = csvfile.read(1024)
+            with open(file_path, 'r', encoding=encoding, newline='') as csvfile:
+                # Try to detect delimiter from a small sample of whole lines
+                sample = csvfile.read(self.SNIFF_SIZE)
+                if len(sample) == self.SNIFF_SIZE and '\n' in sample:
+                    sample = sample[:sample.rindex('\n') + 1]
                 csvfile.seek(0)
                 sniffer = csv.Sniffer()
                 delimiter = sniffer.sniff(sample).delimiter
@@ -113,14 +178,15 @@ class CSVImportService:
                         'error': f'Отсутствуют обязательные колонки: {", ".join(missing_required)}'
                     }
                 
-                # Count rows
-                row_count = sum(1 for row in reader)
+                # Estimate rows from raw line breaks instead of parsing the whole file
+                row_count = self._count_data_lines(file_path)
                 
                 return {
                     'valid': True,
                     'headers': headers,
                     'row_count': row_count,
                     'delimiter': delimiter,
+                    'encoding': encoding,
                     'required_columns': required_columns,
                     'optional_columns': optional_columns
                 }
@@ -131,21 +197,53 @@ class CSVImportService:
                 'error': f'Ошибка чтения файла: {str(e)}'
             }
     
+    def _count_data_lines(self, file_path: str) -> int:
+        """
+        Count lines after the header by scanning raw bytes for line breaks
+        
+        Args:
+            file_path: Path to CSV file
+            
+        Returns:
+            Number of lines after the header
+        """
+        line_count = 0
+        ends_with_newline = True
+        # Unbuffered reads into one reused buffer: no intermediate copy or per-chunk allocation
+        buffer = bytearray(self.READ_BUFFER_SIZE)
+        with open(file_path, 'rb', buffering=0) as f:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                line_count += buffer.count(b'\n', 0, size)
+                ends_with_newline = buffer[size - 1] == 0x0A
+        if not ends_with_newline:
+            line_count += 1
+        return max(line_count - 1, 0)
+    
     def import_students_from_csv(self, file_path: str, 
-                                skip_duplicates: bool = True) -> Dict[str, Any]:
+                                skip_duplicates: bool = True,
+                                validation: Optional[Dict[str, Any]] = None,
+                                progress_callback: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
         """
         Import students from CSV file
         
         Args:
             file_path: Path to CSV file
             skip_duplicates: Whether to skip duplicate phone numbers
+            validation: Result of validate_csv_format() for this file, if already known
+            progress_callback: Called with the number of rows processed after each committed batch
             
         Returns:
             Dict with import results
         """
+        imported_count = 0
+        skipped_count = 0
         try:
             # Validate file first
-            validation = self.validate_csv_format(file_path)
+            if validation is None:
+                validation = self.validate_csv_format(file_path)
             if not validation['valid']:
                 return {
                     'success': False,
@@ -155,27 +253,50 @@ class CSVImportService:
                     'errors': []
                 }
             
-            imported_count = 0
-            skipped_count = 0
             errors = []
+            total_rows = 0
+            batch = []
+            seen_phones = set()
             
-            # Detect file encoding
-            encoding = self.detect_encoding(file_path)
-            logger.info(f"Using encoding: {encoding}")
-            
-            with open(file_path, 'r', encoding=encoding) as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=validation['delimiter'])
+            # Reuse the encoding detected during validation
+            with open(file_path, 'r', encoding=validation['encoding'], newline='',
+                      buffering=self.READ_BUFFER_SIZE) as csvfile:
+                reader = csv.reader(csvfile, delimiter=validation['delimiter'])
+                headers = next(reader, [])
+                
+                # Resolve column positions once; absent optional columns
+                # point at an empty padding cell past the last header
+                width = len(headers)
+                column_index = {name: index for index, name in enumerate(headers)}
+                first_name_idx = column_index['first_name']
+                last_name_idx = column_index['last_name']
+                phone_idx = column_index['phone']
+                telegram_idx = column_index.get('telegram_id', width)
+                email_idx = column_index.get('email', width)
+                belt_idx = column_index.get('current_belt', width)
+                notes_idx = column_index.get('notes', width)
+                default_belt = '' if 'current_belt' in column_index else 'White'
+                padding = [''] * (width + 1)
+                # Checked once so disabled per-row logging costs nothing in the loop
+                debug = logger.isEnabledFor(logging.DEBUG)
                 
                 for row_num, row in enumerate(reader, start=2):  # Start from 2 (header is row 1)
+                    if not row:
+                        continue
+                    total_rows += 1
                     try:
+                        # Pad short rows so every column lookup hits a cell
+                        if len(row) <= width:
+                            row += padding[len(row):]
+                        
                         # Extract data from row
-                        first_name = row.get('first_name', '').strip()
-                        last_name = row.get('last_name', '').strip()
-                        phone = row.get('phone', '').strip()
-                        telegram_id = row.get('telegram_id', '').strip() or None
-                        email = row.get('email', '').strip() or None
-                        current_belt = row.get('current_belt', 'White').strip()
-                        notes = row.get('notes', '').strip() or None
+                        first_name = row[first_name_idx].strip()
+                        last_name = row[last_name_idx].strip()
+                        phone = row[phone_idx].strip()
+                        telegram_id = row[telegram_idx].strip() or None
+                        email = row[email_idx].strip() or None
+                        current_belt = row[belt_idx].strip() or default_belt
+                        notes = row[notes_idx].strip() or None
                         
                         # Validate required fields
                         if not first_name:
@@ -188,51 +309,172 @@ class CSVImportService:
                             errors.append(f"Строка {row_num}: Телефон не может быть пустым")
                             continue
                         
-                        # Check for duplicates if skip_duplicates is True
-                        if skip_duplicates:
-                            existing_student = self.student_controller.get_student_by_phone(phone)
-                            if existing_student:
-                                skipped_count += 1
-                                logger.info(f"Skipped duplicate phone: {phone}")
-                                continue
+                        # Check for duplicates within the file if skip_duplicates is True
+                        if skip_duplicates and phone in seen_phones:
+                            skipped_count += 1
+                            if debug:
+                                logger.debug("Skipped duplicate phone: %s", phone)
+                            continue
                         
-                        # Create student
-                        student = self.student_controller.create_student(
-                            first_name=first_name,
-                            last_name=last_name,
-                            phone=phone,
-                            telegram_id=telegram_id,
-                            email=email,
-                            current_belt=current_belt,
-                            notes=notes
-                        )
+                        # Queue student for bulk insert
+                        batch.append((row_num, {
+                            'first_name': first_name,
+                            'last_name': last_name,
+                            'phone': phone,
+                            'telegram_id': telegram_id,
+                            'email': email,
+                            'current_belt': current_belt,
+                            'notes': notes
+                        }))
+                        seen_phones.add(phone)
+                        if debug:
+                            logger.debug("Queued student: %s %s", first_name, last_name)
                         
-                        imported_count += 1
-                        logger.info(f"Imported student: {student.first_name} {student.last_name}")
+                        if len(batch) >= self.BATCH_SIZE:
+                            imported, skipped = self._flush_batch(batch, skip_duplicates, errors)
+                            # Commit per batch to keep transactions short on large files
+                            self.db.commit()
+                            imported_count += imported
+                            skipped_count += skipped
+                            batch.clear()
+                            if progress_callback:
+                                progress_callback(total_rows)
                         
                     except Exception as e:
                         error_msg = f"Строка {row_num}: {str(e)}"
                         errors.append(error_msg)
                         logger.error(error_msg)
             
+            if batch:
+                imported, skipped = self._flush_batch(batch, skip_duplicates, errors)
+                self.db.commit()
+                imported_count += imported
+                skipped_count += skipped
+            if progress_callback:
+                progress_callback(total_rows)
+            logger.info("CSV import finished: imported=%d skipped=%d errors=%d",
+                        imported_count, skipped_count, len(errors))
+            
             return {
                 'success': True,
                 'imported_count': imported_count,
                 'skipped_count': skipped_count,
                 'errors': errors,
-                'total_rows': validation['row_count']
+                'total_rows': total_rows
             }
             
         except Exception as e:
+            self.db.rollback()
             logger.error(f"Failed to import CSV: {e}")
+            # Batches committed before the failure stay in the database
             return {
                 'success': False,
                 'error': f'Ошибка импорта: {str(e)}',
-                'imported_count': 0,
-                'skipped_count': 0,
+                'imported_count': imported_count,
+                'skipped_count': skipped_count,
                 'errors': []
             }
     
+    def _flush_batch(self, batch: List[Tuple[int, Dict[str, Any]]], 
+                     skip_duplicates: bool, errors: List[str]) -> Tuple[int, int]:
+        """
+        Write queued students, skipping phones already in the database
+        
+        Args:
+            batch: List of (row number, student values) pairs
+            skip_duplicates: Whether to skip already registered phones
+            errors: List to append per-row error messages to
+            
+        Returns:
+            Tuple of (imported count, skipped count)
+        """
+        skipped = 0
+        students = Student.__table__
+        stmt = insert(students)
+        if skip_duplicates:
+            dialect_insert = CONFLICT_INSERTS.get(self.db.get_bind().dialect.name)
+            if dialect_insert is not None:
+                # Let the database skip known phones via ON CONFLICT DO NOTHING
+                stmt = (dialect_insert(students)
+                        .on_conflict_do_nothing(index_elements=[students.c.phone])
+                        .returning(students.c.id))
+            else:
+                existing_phones = self._find_existing_phones([values['phone'] for _, values in batch])
+                if existing_phones:
+                    debug = logger.isEnabledFor(logging.DEBUG)
+                    new_rows = []
+                    for row_num, values in batch:
+                        if values['phone'] in existing_phones:
+                            skipped += 1
+                            if debug:
+                                logger.debug("Skipped duplicate phone: %s", values['phone'])
+                        else:
+                            new_rows.append((row_num, values))
+                    batch = new_rows
+        
+        if not batch:
+            return 0, skipped
+        imported, failed = self._insert_batch(stmt, batch, errors)
+        # Rows that neither went in nor failed were skipped by ON CONFLICT
+        return imported, skipped + len(batch) - imported - failed
+    
+    def _find_existing_phones(self, phones: List[str]) -> set:
+        """
+        Find which of the given phones are already registered
+        
+        Args:
+            phones: Phone numbers to look up
+            
+        Returns:
+            Set of phones present in the database
+        """
+        existing_phones = set()
+        for start in range(0, len(phones), self.LOOKUP_SIZE):
+            chunk = phones[start:start + self.LOOKUP_SIZE]
+            existing_phones.update(
+                self.db.scalars(select(Student.phone).where(Student.phone.in_(chunk)))
+            )
+        return existing_phones
+    
+    def _insert_batch(self, stmt, batch: List[Tuple[int, Dict[str, Any]]], 
+                      errors: List[str]) -> Tuple[int, int]:
+        """
+        Insert a batch of students with a single executemany INSERT
+        
+        Uses a Core INSERT on the students table, so no ORM objects or
+        identity map entries are created for imported rows.
+        
+        If the batch violates a constraint, rows are retried one by one so
+        that a single bad row does not discard the whole batch.
+        
+        Args:
+            stmt: INSERT statement; with RETURNING, only returned rows count as inserted
+            batch: List of (row number, student values) pairs
+            errors: List to append per-row error messages to
+            
+        Returns:
+            Tuple of (inserted count, failed count)
+        """
+        try:
+            with self.db.begin_nested():
+                result = self.db.execute(stmt, [values for _, values in batch])
+                inserted = len(result.all()) if result.returns_rows else len(batch)
+            return inserted, 0
+        except IntegrityError:
+            inserted = 0
+            failed = 0
+            for row_num, values in batch:
+                try:
+                    with self.db.begin_nested():
+                        result = self.db.execute(stmt, [values])
+                        inserted += len(result.all()) if result.returns_rows else 1
+                except IntegrityError as e:
+                    failed += 1
+                    error_msg = f"Строка {row_num}: {e.orig}"
+                    errors.append(error_msg)
+                    logger.error(error_msg)
+            return inserted, failed
+    
     def get_csv_template(self) -> str:
         """
         Get CSV template for student import
@@ -246,11 +488,11 @@ class CSVImportService:
             ['Student', 'Two', '+7-999-000-00-02', '@student2', 'student2@example.com', 'Blue', 'Intermediate student']
         ]
         
-        output = []
-        for row in template_data:
-            output.append(','.join(f'"{cell}"' for cell in row))
+        output = io.StringIO()
+        writer = csv.writer(output, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerows(template_data)
         
-        return '\n'.join(output)
+        return output.getvalue()
     
     def export_template_to_file(self, file_path: str) -> bool:
         """
@@ -8,10 +8,12 @@ import os
 import sys
 import csv
 import io
+import re
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 import requests
 import json
+from sqlalchemy import select
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -19,6 +21,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from database.connection import SessionLocal
 from app.models import Student, Trainer, Training, Attendance, Subscription, Payment, BeltExam
 
+# Patterns for Google Sheets URLs
+SHEET_ID_PATTERNS = [
+    re.compile(r'/spreadsheets/d/([a-zA-Z0-9-_]+)'),
+    re.compile(r'id=([a-zA-Z0-9-_]+)'),
+]
+GID_PATTERN = re.compile(r'gid=(\d+)')
+
+# Number of keys per IN (...) lookup (stays under SQLite's bind limit)
+LOOKUP_SIZE = 500
+
 
 class GoogleDriveService:
     """Service for importing data from Google Drive"""
@@ -135,7 +147,17 @@ class GoogleDriveService:
         errors = []
         
         try:
-            for row_num, row in enumerate(csv_reader, 1):
+            rows = list(csv_reader)
+            
+            # Look up existing students for the whole file at once instead of per row
+            by_phone = self._find_students(db, Student.phone, {
+                (row.get('phone') or '').strip() for row in rows
+            })
+            by_telegram = self._find_students(db, Student.telegram_id, {
+                (row.get('telegram_id') or '').strip() for row in rows
+            })
+            
+            for row_num, row in enumerate(rows, 1):
                 try:
                     # Validate required fields
                     if not row.get('first_name') or not row.get('last_name'):
@@ -143,21 +165,10 @@ class GoogleDriveService:
                         continue
                     
                     # Check if student already exists (by phone first, then telegram_id)
-                    existing_student = None
                     telegram_id = row.get('telegram_id', '').strip()
                     phone = row.get('phone', '').strip()
-                    
-                    # First check by phone (more unique)
-                    if phone:
-                        existing_student = db.query(Student).filter(
-                            Student.phone == phone
-                        ).first()
-                    
-                    # If not found by phone, check by telegram_id
-                    if not existing_student and telegram_id:
-                        existing_student = db.query(Student).filter(
-                            Student.telegram_id == telegram_id
-                        ).first()
+                    existing_student = (phone and by_phone.get(phone)) or \
+                        (telegram_id and by_telegram.get(telegram_id)) or None
                     
                     if existing_student:
                         # Update existing student instead of skipping
@@ -192,6 +203,13 @@ class GoogleDriveService:
                     db.add(student)
                     imported_count += 1
                     
+                    # Later rows with the same phone/telegram update this student
+                    # Keyed by the stripped phone that lookups use
+                    if phone:
+                        by_phone[phone] = student
+                    if final_telegram_id:
+                        by_telegram[final_telegram_id] = student
+                    
                 except Exception as e:
                     errors.append(f"Строка {row_num}: {str(e)}")
             
@@ -209,6 +227,26 @@ class GoogleDriveService:
         finally:
             db.close()
     
+    def _find_students(self, db, column, values) -> Dict[str, Student]:
+        """
+        Find students whose column matches any of the given values
+        
+        Args:
+            db: Database session
+            column: Student column to match (phone or telegram_id)
+            values: Values to look up; empty values are ignored
+            
+        Returns:
+            Dict mapping matched value to student
+        """
+        values = [value for value in values if value]
+        found = {}
+        for start in range(0, len(values), LOOKUP_SIZE):
+            chunk = values[start:start + LOOKUP_SIZE]
+            for student in db.scalars(select(Student).where(column.in_(chunk))):
+                found[getattr(student, column.key)] = student
+        return found
+    
     def _import_trainings(self, csv_reader) -> Dict[str, Any]:
         """Import trainings from CSV data"""
         db = SessionLocal()
@@ -462,19 +500,11 @@ class GoogleDriveService:
             return url
         
         # Extract sheet ID from various Google Sheets URL formats
-        import re
-        
-        # Pattern for Google Sheets URLs
-        patterns = [
-            r'/spreadsheets/d/([a-zA-Z0-9-_]+)',
-            r'id=([a-zA-Z0-9-_]+)',
-        ]
-        
         sheet_id = None
         gid = None
         
-        for pattern in patterns:
-            match = re.search(pattern, url)
+        for pattern in SHEET_ID_PATTERNS:
+            match = pattern.search(url)
             if match:
                 sheet_id = match.group(1)
                 break
@@ -483,7 +513,7 @@ class GoogleDriveService:
             raise ValueError("Не удалось извлечь ID таблицы из URL")
         
         # Extract gid if present
-        gid_match = re.search(r'gid=(\d+)', url)
+        gid_match = GID_PATTERN.search(url)
         if gid_match:
             gid = gid_match.group(1)
         
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+UI state persistence for BJJ CRM System
+Remembers small user preferences (e.g. last used folders) between runs
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path.home() / ".bjj_crm_state.json"
+
+# Last folder used for CSV import/template files
+CSV_DIR_KEY = "csv_last_dir"
+
+
+def load_state() -> Dict[str, Any]:
+    """
+    Load saved UI state
+    
+    Returns:
+        State dict, empty if nothing was saved or the file is unreadable
+    """
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to load UI state: {e}")
+        return {}
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    """
+    Save UI state
+    
+    Args:
+        state: State dict to persist
+    """
+    try:
+        with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+    except OSError as e:
+        logger.warning(f"Failed to save UI state: {e}")
+
+
+def get_last_dir(key: str) -> str:
+    """Return the remembered folder for key, or the home folder"""
+    return load_state().get(key) or str(Path.home())
+
+
+def remember_dir(key: str, file_path: str) -> None:
+    """Remember the folder of file_path under key"""
+    state = load_state()
+    state[key] = str(Path(file_path).parent)
+    save_state(state)
@@ -7,12 +7,10 @@ Dialog for importing student data from CSV files
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
-import sys
+import queue
+import threading
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-from app.services.csv_import_service import CSVImportService
+from app.utils.state import CSV_DIR_KEY, get_last_dir, remember_dir
 
 
 class CSVImportDialog:
@@ -21,24 +19,29 @@ class CSVImportDialog:
     def __init__(self, parent, refresh_callback=None):
         self.parent = parent
         self.refresh_callback = refresh_callback
+        # Imported on first use so loading the GUI does not pull in the import stack
+        from app.services.csv_import_service import CSVImportService
         self.import_service = CSVImportService()
         self.selected_file = None
+        self._result_queue = queue.Queue()
+        self._validated = None  # (file_path, mtime, validation) of the last valid file
+        self._worker_running = False
         
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("📥 Импорт учеников из CSV")
-        self.dialog.geometry("700x600")
+        
+        # Size and center dialog in one geometry call
+        width, height = 700, 600
+        x = (self.dialog.winfo_screenwidth() - width) // 2
+        y = (self.dialog.winfo_screenheight() - height) // 2
+        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
         self.dialog.resizable(True, True)
         
         # Make dialog modal
         self.dialog.transient(parent)
         self.dialog.grab_set()
-        
-        # Center dialog
-        self.dialog.update_idletasks()
-        x = (self.dialog.winfo_screenwidth() // 2) - (700 // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (600 // 2)
-        self.dialog.geometry(f"700x600+{x}+{y}")
+        self.dialog.protocol("WM_DELETE_WINDOW", self._on_close)
         
         self.create_widgets()
     
@@ -109,9 +112,9 @@ class CSVImportDialog:
         buttons_frame = ttk.Frame(main_frame)
         buttons_frame.pack(fill=tk.X, pady=(0, 20))
         
-        validate_button = ttk.Button(buttons_frame, text="✅ Проверить формат", 
-                                   command=self.validate_file)
-        validate_button.pack(side=tk.LEFT, padx=(0, 10))
+        self.validate_button = ttk.Button(buttons_frame, text="✅ Проверить формат", 
+                                        command=self.validate_file)
+        self.validate_button.pack(side=tk.LEFT, padx=(0, 10))
         
         self.import_button = ttk.Button(buttons_frame, text="📥 Импортировать", 
                                        command=self.import_data, state=tk.DISABLED)
@@ -126,7 +129,8 @@ class CSVImportDialog:
         results_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
         # Results text widget
-        self.results_text = tk.Text(results_frame, height=10, wrap=tk.WORD)
+        # Read-only; written through _set_results()
+        self.results_text = tk.Text(results_frame, height=10, wrap=tk.WORD, state=tk.DISABLED)
         results_scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results_text.yview)
         self.results_text.configure(yscrollcommand=results_scrollbar.set)
         
@@ -154,13 +158,14 @@ Student,One,+7-999-000-00-01,@student1,student1@example.com,White,Beginner stude
         help_label.pack(anchor=tk.W)
         
         # Close button
-        close_button = ttk.Button(main_frame, text="❌ Закрыть", command=self.dialog.destroy)
+        close_button = ttk.Button(main_frame, text="❌ Закрыть", command=self._on_close)
         close_button.pack(pady=(20, 0))
     
     def select_csv_file(self):
         """Select CSV file for import"""
         try:
             file_path = filedialog.askopenfilename(
+                initialdir=get_last_dir(CSV_DIR_KEY),
                 title="Выберите CSV файл с данными учеников",
                 filetypes=[
                     ("CSV files", "*.csv"),
@@ -168,14 +173,14 @@ Student,One,+7-999-000-00-01,@student1,student1@example.com,White,Beginner stude
                 ]
             )
             if file_path:
+                remember_dir(CSV_DIR_KEY, file_path)
                 self.file_path_var.set(file_path)
                 self.selected_file = file_path
                 self.file_entry.config(foreground="black")
                 
                 # Show file selection in results
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, f"📁 Выбран файл: {file_path}\n")
-                self.results_text.insert(tk.END, f"📊 Нажмите 'Проверить формат' для валидации\n")
+                self._set_results(f"📁 Выбран файл: {file_path}\n"
+                                  f"📊 Нажмите 'Проверить формат' для валидации\n")
         except Exception as e:
             messagebox.showerror("❌ Ошибка", f"Ошибка выбора файла: {e}")
     
@@ -191,48 +196,7 @@ Student,One,+7-999-000-00-01,@student1,student1@example.com,White,Beginner stude
             messagebox.showerror("❌ Ошибка", "Файл не найден")
             return
         
-        try:
-            # Show progress
-            self.dialog.config(cursor="wait")
-            self.dialog.update()
-            
-            validation = self.import_service.validate_csv_format(file_path)
-            
-            if validation['valid']:
-                message = f"✅ Файл готов к импорту!\n\n"
-                message += f"Заголовки: {', '.join(validation['headers'])}\n"
-                message += f"Строк данных: {validation['row_count']}\n"
-                message += f"Разделитель: '{validation['delimiter']}'"
-                
-                messagebox.showinfo("✅ Валидация успешна", message)
-                
-                # Show validation results in text widget
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, f"✅ Файл прошел валидацию\n")
-                self.results_text.insert(tk.END, f"Заголовки: {', '.join(validation['headers'])}\n")
-                self.results_text.insert(tk.END, f"Строк данных: {validation['row_count']}\n")
-                self.results_text.insert(tk.END, f"Разделитель: '{validation['delimiter']}'\n")
-                
-                # Enable import button after successful validation
-                self.import_button.config(state=tk.NORMAL)
-            else:
-                messagebox.showerror("❌ Ошибка валидации", validation['error'])
-                
-                # Show error in text widget
-                self.results_text.delete(1.0, tk.END)
-                self.results_text.insert(tk.END, f"❌ Ошибка валидации: {validation['error']}\n")
-                
-                # Disable import button on validation error
-                self.import_button.config(state=tk.DISABLED)
-        
-        except Exception as e:
-            messagebox.showerror("❌ Ошибка", f"Ошибка проверки файла:\n{str(e)}")
-            
-            # Disable import button on error
-            self.import_button.config(state=tk.DISABLED)
-        
-        finally:
-            self.dialog.config(cursor="")
+        self._start_worker(self._run_validation, file_path)
     
     def import_data(self):
         """Import data from CSV file"""
@@ -245,60 +209,175 @@ Student,One,+7-999-000-00-01,@student1,student1@example.com,White,Beginner stude
             messagebox.showerror("❌ Ошибка", "Файл не найден")
             return
         
-        try:
-            # Show progress
-            self.dialog.config(cursor="wait")
-            self.dialog.update()
-            
-            skip_duplicates = self.skip_duplicates_var.get()
-            result = self.import_service.import_students_from_csv(file_path, skip_duplicates)
-            
-            # Show results in text widget
-            self.results_text.delete(1.0, tk.END)
-            
-            if result['success']:
-                self.results_text.insert(tk.END, f"✅ Импорт завершен успешно!\n\n")
-                self.results_text.insert(tk.END, f"Импортировано учеников: {result['imported_count']}\n")
-                self.results_text.insert(tk.END, f"Пропущено дубликатов: {result['skipped_count']}\n")
-                self.results_text.insert(tk.END, f"Всего строк в файле: {result['total_rows']}\n")
-                
-                if result['errors']:
-                    self.results_text.insert(tk.END, f"\n⚠️ Ошибки ({len(result['errors'])}):\n")
-                    for error in result['errors'][:10]:  # Show first 10 errors
-                        self.results_text.insert(tk.END, f"• {error}\n")
-                    if len(result['errors']) > 10:
-                        self.results_text.insert(tk.END, f"... и еще {len(result['errors']) - 10} ошибок\n")
-                
-                # Show success message
-                message = f"Импорт завершен!\n\n"
-                message += f"Импортировано: {result['imported_count']}\n"
-                message += f"Пропущено: {result['skipped_count']}\n"
-                message += f"Ошибок: {len(result['errors'])}"
-                
-                messagebox.showinfo("✅ Импорт завершен", message)
-                
-                # Refresh parent if callback provided
-                if self.refresh_callback:
-                    self.refresh_callback()
-                
-                # Disable import button after successful import
-                self.import_button.config(state=tk.DISABLED)
-            else:
-                self.results_text.insert(tk.END, f"❌ Ошибка импорта: {result['error']}\n")
-                messagebox.showerror("❌ Ошибка импорта", result['error'])
+        # Reuse the last validation unless the file has changed since
+        validation = None
+        if self._validated:
+            validated_path, validated_mtime, cached = self._validated
+            if validated_path == file_path and validated_mtime == os.path.getmtime(file_path):
+                validation = cached
         
+        skip_duplicates = self.skip_duplicates_var.get()
+        self._set_results("")
+        self._start_worker(self._run_import, file_path, skip_duplicates, validation)
+    
+    def _start_worker(self, target, *args):
+        """Run target in a background thread and poll its results from the Tk loop"""
+        self.dialog.config(cursor="wait")
+        self.validate_button.config(state=tk.DISABLED)
+        self.import_button.config(state=tk.DISABLED)
+        self._worker_running = True
+        threading.Thread(target=target, args=args, daemon=True).start()
+        self.dialog.after(50, self._drain_queue)
+    
+    def _run_validation(self, file_path):
+        """Validate file in worker thread"""
+        from app.services.csv_import_service import CSVImportService
+        
+        # Sessions must not be shared between threads, so the worker uses its own service
+        service = CSVImportService()
+        try:
+            mtime = os.path.getmtime(file_path)
+            validation = service.validate_csv_format(file_path)
+            self._result_queue.put(("validated", (file_path, mtime, validation)))
         except Exception as e:
-            error_msg = f"Ошибка импорта: {str(e)}"
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, error_msg)
-            messagebox.showerror("❌ Ошибка", error_msg)
+            self._result_queue.put(("error", f"Ошибка проверки файла:\n{str(e)}"))
+        finally:
+            service.close()
+    
+    def _run_import(self, file_path, skip_duplicates, validation):
+        """Import file in worker thread"""
+        from app.services.csv_import_service import CSVImportService
         
+        service = CSVImportService()
+        try:
+            result = service.import_students_from_csv(
+                file_path, skip_duplicates, validation=validation,
+                progress_callback=lambda row_count: self._result_queue.put(("progress", row_count))
+            )
+            self._result_queue.put(("imported", result))
+        except Exception as e:
+            self._result_queue.put(("error", f"Ошибка импорта: {str(e)}"))
         finally:
+            service.close()
+    
+    def _drain_queue(self):
+        """Apply messages posted by the worker thread"""
+        finished = False
+        progress = None
+        try:
+            while True:
+                kind, payload = self._result_queue.get_nowait()
+                if kind == "progress":
+                    # Only the latest count is drawn, at most once per poll
+                    progress = payload
+                    continue
+                finished = True
+                if kind == "validated":
+                    self._show_validation(*payload)
+                elif kind == "imported":
+                    self._show_import_result(payload)
+                else:
+                    self._show_error(payload)
+        except queue.Empty:
+            pass
+        
+        if finished:
+            self._worker_running = False
             self.dialog.config(cursor="")
+            self.validate_button.config(state=tk.NORMAL)
+        else:
+            if progress is not None:
+                self._update_progress(progress)
+            self.dialog.after(50, self._drain_queue)
+    
+    def _show_validation(self, file_path, mtime, validation):
+        """Show validation result"""
+        if validation['valid']:
+            self._validated = (file_path, mtime, validation)
+            
+            message = f"✅ Файл готов к импорту!\n\n"
+            message += f"Заголовки: {', '.join(validation['headers'])}\n"
+            message += f"Строк данных: {validation['row_count']}\n"
+            message += f"Разделитель: '{validation['delimiter']}'"
+            
+            messagebox.showinfo("✅ Валидация успешна", message)
+            
+            # Show validation results in text widget
+            self._set_results(
+                f"✅ Файл прошел валидацию\n"
+                f"Заголовки: {', '.join(validation['headers'])}\n"
+                f"Строк данных: {validation['row_count']}\n"
+                f"Разделитель: '{validation['delimiter']}'\n"
+            )
+            
+            # Enable import button after successful validation
+            self.import_button.config(state=tk.NORMAL)
+        else:
+            messagebox.showerror("❌ Ошибка валидации", validation['error'])
+            
+            # Show error in text widget
+            self._set_results(f"❌ Ошибка валидации: {validation['error']}\n")
+    
+    def _show_import_result(self, result):
+        """Show import result"""
+        if result['success']:
+            # Build the report first so the widget is updated with a single insert
+            lines = [
+                "✅ Импорт завершен успешно!\n",
+                f"Импортировано учеников: {result['imported_count']}",
+                f"Пропущено дубликатов: {result['skipped_count']}",
+                f"Всего строк в файле: {result['total_rows']}",
+            ]
+            
+            if result['errors']:
+                lines.append(f"\n⚠️ Ошибки ({len(result['errors'])}):")
+                lines.extend(f"• {error}" for error in result['errors'][:10])  # Show first 10 errors
+                if len(result['errors']) > 10:
+                    lines.append(f"... и еще {len(result['errors']) - 10} ошибок")
+            
+            self._set_results("\n".join(lines) + "\n")
+            
+            # Show success message
+            message = f"Импорт завершен!\n\n"
+            message += f"Импортировано: {result['imported_count']}\n"
+            message += f"Пропущено: {result['skipped_count']}\n"
+            message += f"Ошибок: {len(result['errors'])}"
+            
+            messagebox.showinfo("✅ Импорт завершен", message)
+            
+            # Refresh parent if callback provided
+            if self.refresh_callback:
+                self.refresh_callback()
+        else:
+            self._set_results(f"❌ Ошибка импорта: {result['error']}\n")
+            messagebox.showerror("❌ Ошибка импорта", result['error'])
+            
+            # Allow retrying the same file
+            self.import_button.config(state=tk.NORMAL)
+    
+    def _show_error(self, error_msg):
+        """Show unexpected worker error"""
+        self._set_results(error_msg)
+        messagebox.showerror("❌ Ошибка", error_msg)
+        
+        # Allow retrying once the problem is fixed
+        self.import_button.config(state=tk.NORMAL)
+    
+    def _update_progress(self, row_count):
+        """Show how many rows have been processed so far"""
+        self._set_results(f"⏳ Обработано строк: {row_count}\n")
+    
+    def _set_results(self, text):
+        """Replace results text in one insert"""
+        self.results_text.configure(state=tk.NORMAL)
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, text)
+        self.results_text.configure(state=tk.DISABLED)
     
     def download_template(self):
         """Download CSV template"""
         file_path = filedialog.asksaveasfilename(
+            initialdir=get_last_dir(CSV_DIR_KEY),
             title="Сохранить шаблон CSV",
             defaultextension=".csv",
             filetypes=[
@@ -308,6 +387,7 @@ Student,One,+7-999-000-00-01,@student1,student1@example.com,White,Beginner stude
         )
         
         if file_path:
+            remember_dir(CSV_DIR_KEY, file_path)
             try:
                 if self.import_service.export_template_to_file(file_path):
                     messagebox.showinfo("✅ Успех", f"Шаблон сохранен в:\n{file_path}")
@@ -316,10 +396,18 @@ Student,One,+7-999-000-00-01,@student1,student1@example.com,White,Beginner stude
             except Exception as e:
                 messagebox.showerror("❌ Ошибка", f"Ошибка сохранения шаблона:\n{str(e)}")
     
-    def __del__(self):
-        """Cleanup when dialog is destroyed"""
-        if hasattr(self, 'import_service'):
+    def _on_close(self):
+        """Release the database session and close the dialog"""
+        # The worker keeps writing and its result must still reach the main window
+        if self._worker_running:
+            messagebox.showwarning("⚠️ Подождите", "Дождитесь завершения операции перед закрытием окна",
+                                   parent=self.dialog)
+            return
+        try:
             self.import_service.close()
+        except Exception:
+            pass
+        self.dialog.destroy()
 
 
 def show_csv_import_dialog(parent, refresh_callback=None):
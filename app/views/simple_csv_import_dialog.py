@@ -5,13 +5,26 @@ Alternative CSV Import Dialog with simpler interface
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import atexit
 import os
-import sys
+import threading
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.utils.state import CSV_DIR_KEY, get_last_dir, remember_dir
 
-from app.services.csv_import_service import CSVImportService
+_service = None
+_service_lock = threading.Lock()
+
+
+def _get_service():
+    """Return the import service shared by all dialog invocations"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            # Imported on first use so loading the GUI does not pull in the import stack
+            from app.services.csv_import_service import CSVImportService
+            _service = CSVImportService()
+            atexit.register(_service.close)
+        return _service
 
 
 def show_simple_csv_import_dialog(parent, refresh_callback=None):
@@ -20,16 +33,15 @@ def show_simple_csv_import_dialog(parent, refresh_callback=None):
     # Create dialog window
     dialog = tk.Toplevel(parent)
     dialog.title("📥 Импорт учеников из CSV")
-    dialog.geometry("500x400")
+    
+    # Size and center dialog in one geometry call
+    width, height = 500, 400
+    x = (dialog.winfo_screenwidth() - width) // 2
+    y = (dialog.winfo_screenheight() - height) // 2
+    dialog.geometry(f"{width}x{height}+{x}+{y}")
     dialog.transient(parent)
     dialog.grab_set()
     
-    # Center dialog
-    dialog.update_idletasks()
-    x = (dialog.winfo_screenwidth() // 2) - (500 // 2)
-    y = (dialog.winfo_screenheight() // 2) - (400 // 2)
-    dialog.geometry(f"500x400+{x}+{y}")
-    
     # Main frame
     main_frame = ttk.Frame(dialog, padding="20")
     main_frame.pack(fill=tk.BOTH, expand=True)
@@ -51,6 +63,7 @@ def show_simple_csv_import_dialog(parent, refresh_callback=None):
     # File selection button
     def select_file():
         file_path = filedialog.askopenfilename(
+            initialdir=get_last_dir(CSV_DIR_KEY),
             title="Выберите CSV файл с данными учеников",
             filetypes=[
                 ("CSV files", "*.csv"),
@@ -58,6 +71,7 @@ def show_simple_csv_import_dialog(parent, refresh_callback=None):
             ]
         )
         if file_path:
+            remember_dir(CSV_DIR_KEY, file_path)
             file_path_var.set(file_path)
             file_entry.config(state="normal")
             file_entry.delete(0, tk.END)
@@ -89,18 +103,17 @@ def show_simple_csv_import_dialog(parent, refresh_callback=None):
             return
         
         try:
-            import_service = CSVImportService()
+            import_service = _get_service()
             
             # Validate file
             validation = import_service.validate_csv_format(file_path)
             if not validation['valid']:
                 messagebox.showerror("❌ Ошибка валидации", validation['error'])
-                import_service.close()
                 return
             
             # Import data
-            result = import_service.import_students_from_csv(file_path, skip_duplicates_var.get())
-            import_service.close()
+            result = import_service.import_students_from_csv(file_path, skip_duplicates_var.get(),
+                                                              validation=validation)
             
             if result['success']:
                 message = f"✅ Импорт завершен!\n\n"
@@ -132,19 +145,19 @@ def show_simple_csv_import_dialog(parent, refresh_callback=None):
     
     def download_template():
         file_path = filedialog.asksaveasfilename(
+            initialdir=get_last_dir(CSV_DIR_KEY),
             title="Сохранить шаблон CSV",
             defaultextension=".csv",
             filetypes=[("CSV files", "*.csv")]
         )
         
         if file_path:
+            remember_dir(CSV_DIR_KEY, file_path)
             try:
-                import_service = CSVImportService()
-                if import_service.export_template_to_file(file_path):
+                if _get_service().export_template_to_file(file_path):
                     messagebox.showinfo("✅ Успех", f"Шаблон сохранен в:\n{file_path}")
                 else:
                     messagebox.showerror("❌ Ошибка", "Не удалось сохранить шаблон")
-                import_service.close()
             except Exception as e:
                 messagebox.showerror("❌ Ошибка", f"Ошибка сохранения: {str(e)}")
     
@@ -1,23 +1,88 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from app.models import Base
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+DEFAULT_DATABASE_URL = "sqlite:///./bjj_crm.db"
 
-# Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bjj_crm.db")
+# Stored in SQLite's user_version; bump when the models change so existing databases get the new tables and indexes
+SCHEMA_VERSION = 1
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=False)  # Set to False for production
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for write-heavy imports on every new connection"""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers continue during imports; NORMAL syncs on checkpoint, not every commit
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@lru_cache(maxsize=1)
+def get_engine():
+    """Create the database engine on first use"""
+    load_dotenv(override=False)
+    database_url = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+    # Engine options
+    engine_options = {}
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql" and url.get_driver_name() == "psycopg2":
+        # Collapse executemany INSERTs into multi-VALUES statements
+        engine_options["executemany_mode"] = "values_plus_batch"
+    if url.database not in (None, "", ":memory:"):
+        # Keep warm connections and drop stale ones before use
+        engine_options.update(pool_size=10, max_overflow=20, pool_pre_ping=True, pool_recycle=1800)
+    if url.get_backend_name() == "sqlite":
+        # Wait for a concurrent writer (e.g. a background import) instead of failing with "database is locked"
+        engine_options["connect_args"] = {"timeout": 30}
+
+    engine = create_engine(database_url, echo=False, **engine_options)  # Set to False for production
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def _session_factory():
+    """Create the session factory bound to the engine"""
+    # Committed objects stay readable without a SELECT per expired attribute
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=get_engine())
+
+
+def SessionLocal(**kwargs):
+    """Create a new database session"""
+    return _session_factory()(**kwargs)
 
 def create_tables():
     """Create all tables in the database"""
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    # create_all() skips existing tables, so add indexes declared later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def ensure_tables():
+    """Create tables unless the database already records this schema version"""
+    engine = get_engine()
+    if engine.dialect.name != "sqlite":
+        create_tables()
+        return
+    # The version lives in the database file itself, so a deleted or replaced file is set up again
+    with engine.connect() as connection:
+        if connection.exec_driver_sql("PRAGMA user_version").scalar() >= SCHEMA_VERSION:
+            return
+    create_tables()
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
 def get_db():
     """Dependency to get database session"""
@@ -8,78 +8,404 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import sys
-from datetime import datetime
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from database.connection import create_tables, SessionLocal
+from database.connection import ensure_tables, get_engine, SessionLocal
 from app.services.backup_service import BackupService
 from app.services.clipboard_service import ClipboardService, create_context_menu
 from app.views.backup_dialog import BackupDialog
 from app.views.export_import_dialog import show_export_import_dialog
 from app.views.simple_csv_import_dialog import show_simple_csv_import_dialog
 from app.controllers import StudentController, TrainingController, PaymentController
-from app.models import Student, Trainer, Training, Attendance, Payment
+
+logger = logging.getLogger(__name__)
+
+# Tcl helper that inserts a whole list of rows into a treeview in one call
+FILL_TREE_PROC = "proc ::bjj_fill_tree {tree rows} { foreach row $rows { $tree insert {} end -values $row } }"
+
+# Tcl helper that returns a flat "item value item value ..." list for one column
+COLUMN_VALUES_PROC = (
+    "proc ::bjj_column_values {tree col} {"
+    " set result {}; foreach item [$tree children {}] { lappend result $item [$tree set $item $col] };"
+    " return $result }"
+)
+
+# Rows inserted per step; the first step fills the visible part of the table
+TREE_FILL_CHUNK = 200
+
+# Pending fill callbacks by treeview path
+_pending_fills = {}
+
+# How often the Tk thread checks for finished background loads, in ms
+LOAD_POLL_MS = 50
+
+# Placeholder row shown while a table loads
+LOADING_ROW = ("Загрузка…",)
+
+# Latest background load by treeview path
+_pending_loads = {}
+
+# Pause in typing before the students list is filtered, in ms
+LIVE_FILTER_DELAY_MS = 150
+
+# How long a status bar message stays visible, in ms
+STATUS_CLEAR_MS = 3000
+
+# Belt ranks in promotion order, for the belt choosers
+BELTS = ("White", "Blue", "Purple", "Brown", "Black")
+
+# Screen size, read once in main()
+SCREEN_W = 0
+SCREEN_H = 0
+
+
+def center_geometry(width, height):
+    """Geometry string that centers a window of this size on the screen"""
+    return f"{width}x{height}+{(SCREEN_W - width) // 2}+{(SCREEN_H - height) // 2}"
+
+
+def _ensure_proc(tree, name, script):
+    """Define a Tcl helper proc once per interpreter"""
+    if not tree.tk.call('info', 'procs', name):
+        tree.tk.eval(script)
+
+
+def _sort_key(value):
+    """Order numbers numerically and everything else as case-insensitive text"""
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    # float() also parses "nan" and "inf", which would turn names such as "Nan" into unorderable keys
+    if math.isfinite(number):
+        return (0, number, "")
+    # Dates are shown as YYYY-MM-DD, so text order is date order
+    return (1, 0.0, value.lower())
+
+
+def sort_tree_column(tree, col, reverse=False):
+    """Sort treeview rows by column, toggling the direction on the next click"""
+    _ensure_proc(tree, '::bjj_column_values', COLUMN_VALUES_PROC)
+    # One Tcl call for all values instead of one per row
+    flat = tree.tk.splitlist(tree.tk.call('::bjj_column_values', tree._w, col))
+    items = sorted(zip(flat[1::2], flat[0::2]), key=lambda pair: _sort_key(pair[0]), reverse=reverse)
+    tree.set_children('', *[item for _, item in items])
+    
+    tree.heading(col, command=partial(sort_tree_column, tree, col, not reverse))
+
+
+def replace_tree_rows(tree, rows):
+    """Replace all treeview rows, inserting large row sets in idle-time chunks"""
+    pending = _pending_fills.pop(tree._w, None)
+    if pending:
+        tree.after_cancel(pending)
+    
+    children = tree.get_children()
+    if children:
+        tree.delete(*children)
+    if rows:
+        _ensure_proc(tree, '::bjj_fill_tree', FILL_TREE_PROC)
+        _fill_tree_chunk(tree, tuple(rows), 0)
+
+
+def _fill_tree_chunk(tree, rows, start):
+    """Insert one chunk of rows and schedule the next one when the UI is idle"""
+    end = start + TREE_FILL_CHUNK
+    # Rows are passed as a Tcl list, so values are never evaluated as script
+    tree.tk.call('::bjj_fill_tree', tree._w, rows[start:end])
+    if end < len(rows):
+        _pending_fills[tree._w] = tree.after_idle(_fill_tree_chunk, tree, rows, end)
+    else:
+        _pending_fills.pop(tree._w, None)
+
+
+def run_in_background(widget, data_manager, func, callback):
+    """Run func on the data manager's pool and pass its result to callback on the Tk thread"""
+    future = data_manager.executor.submit(func)
+    widget.after(LOAD_POLL_MS, _poll_future, widget, future, callback)
+    return future
+
+
+def _poll_future(widget, future, callback):
+    """Call back once the future is done, otherwise check again later"""
+    if future.done():
+        callback(future.result())
+    else:
+        widget.after(LOAD_POLL_MS, _poll_future, widget, future, callback)
+
+
+def load_tree_async(tree, data_manager, loader, on_loaded=None, placeholder=True):
+    """Fill the treeview once loader returns in the background, showing a placeholder row meanwhile"""
+    if placeholder:
+        replace_tree_rows(tree, [LOADING_ROW])
+    
+    def show_rows(rows):
+        # A newer load for the same tree wins
+        if _pending_loads.get(tree._w) is not future:
+            return
+        del _pending_loads[tree._w]
+        replace_tree_rows(tree, rows)
+        if on_loaded:
+            on_loaded(rows)
+    
+    future = run_in_background(tree, data_manager, loader, show_rows)
+    _pending_loads[tree._w] = future
+
+
+def start_backup(widget, data_manager, success_message, error_message):
+    """Back up the database on the data manager's pool and report the result in a message box"""
+    def create_backup():
+        try:
+            return BackupService().create_backup(include_files=False), None
+        except Exception as e:
+            return None, e
+    
+    def show_result(result):
+        backup_path, error = result
+        if error is None:
+            messagebox.showinfo("✅ Успех", f"{success_message}:\n{backup_path}")
+        else:
+            messagebox.showerror("❌ Ошибка", f"{error_message}: {error}")
+    
+    run_in_background(widget, data_manager, create_backup, show_result)
 
 
 class DataManager:
     """Centralized data management for the application"""
     
-    def __init__(self):
-        self.db = SessionLocal()
-        self.student_controller = StudentController(self.db)
-        self.training_controller = TrainingController(self.db)
-        self.payment_controller = PaymentController(self.db)
+    def __init__(self, session_factory=SessionLocal):
+        # Each operation gets its own session, so loaded rows do not pile up in one identity map
+        self.session_factory = session_factory
+        # Loads tables concurrently off the Tk thread
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="data-loader")
+        
+        # Formatted rows by list name; any commit (including imports in other sessions) clears it
+        self._cache = {}
+        # Position of each row in its cached list by row ID (as text, the way the tables hold it)
+        self._row_positions = {}
+        # (cached student rows, lowercase search keys) for in-memory filtering
+        self._student_search_index = None
+        # Bumped whenever the cache is cleared, so loads that started before a commit are not cached
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+        event.listen(Session, "after_commit", self._on_commit)
     
     def close(self):
-        """Close database session"""
-        self.db.close()
+        """Stop background loads and tracking data changes, and close pooled connections"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        event.remove(Session, "after_commit", self._on_commit)
+        get_engine().dispose()
+    
+    def session(self):
+        """Open a short-lived session"""
+        return self.session_factory()
+    
+    def invalidate(self, *names):
+        """Drop cached rows for the given lists, or for all lists"""
+        with self._cache_lock:
+            self._cache_generation += 1
+            if names:
+                for name in names:
+                    self._cache.pop(name, None)
+                    self._row_positions.pop(name, None)
+            else:
+                self._cache.clear()
+                self._row_positions.clear()
+    
+    def _on_commit(self, session):
+        """Drop all cached rows after data changes"""
+        self.invalidate()
+    
+    def _cached_rows(self, name, loader):
+        """Return the cached rows list itself, loading it on first use"""
+        with self._cache_lock:
+            rows = self._cache.get(name)
+            generation = self._cache_generation
+        if rows is not None:
+            return rows
+        rows = loader()
+        with self._cache_lock:
+            # A commit during the load may have changed the data, so only a current load is kept;
+            # a concurrent load that finished first stays cached
+            if self._cache_generation == generation and name not in self._cache:
+                self._cache[name] = rows
+                self._row_positions[name] = {str(row[0]): i for i, row in enumerate(rows)}
+            else:
+                rows = self._cache.get(name, rows)
+        return rows
+    
+    def _cached(self, name, loader):
+        """Return a copy of cached rows, loading them on first use"""
+        # Callers may modify the list they get
+        return list(self._cached_rows(name, loader))
+    
+    @staticmethod
+    def _format_student_rows(students):
+        """Convert student rows to treeview values"""
+        return [(student_id, first_name, last_name, phone,
+                telegram_id or "", current_belt,
+                registration_date.strftime("%Y-%m-%d") if registration_date else "")
+                for student_id, first_name, last_name, phone, telegram_id, current_belt, registration_date
+                in students]
+    
+    def _load_students_rows(self):
+        """Query active students and convert them to treeview values"""
+        with self.session() as db:
+            # Rows are formatted as they are fetched, so raw rows are never all held at once
+            return self._format_student_rows(StudentController(db).iter_student_rows())
     
     def load_students_data(self):
         """Load students from database"""
         try:
-            students = self.student_controller.get_all_students()
-            return [(s.id, s.first_name, s.last_name, s.phone, 
-                    s.telegram_id or "", s.current_belt, 
-                    s.registration_date.strftime("%Y-%m-%d") if s.registration_date else "") 
-                    for s in students]
+            return self._cached('students', self._load_students_rows)
+        except Exception as e:
+            logger.error("Error loading students: %s", e)
+            return []
+    
+    def _get_student_search_index(self):
+        """Pair each cached student row with its lowercase name/phone/telegram, built once per load"""
+        rows = self._cached_rows('students', self._load_students_rows)
+        index = self._student_search_index
+        if index is None or index[0] is not rows:
+            # Fields are newline-separated so a match cannot span two of them
+            index = (rows, [("\n".join(str(value) for value in row[1:5]).lower(), row) for row in rows])
+            with self._cache_lock:
+                # Keep the keys only while their rows are still the cached ones
+                if self._cache.get('students') is rows:
+                    self._student_search_index = index
+        return index[1]
+    
+    def replace_cached_student_row(self, values):
+        """Put an edited students table row into the cached rows, matched by student ID"""
+        with self._cache_lock:
+            rows = self._cache.get('students')
+            position = self._row_positions.get('students', {}).get(str(values[0]))
+            if rows is None or position is None:
+                return
+            rows[position] = (rows[position][0],) + tuple(values[1:])
+            # Search keys are rebuilt from the updated rows on the next search
+            self._student_search_index = None
+    
+    def search_students_data(self, text, belt=None):
+        """Filter cached students by search text and belt"""
+        try:
+            text = text.strip().lower()
+            return [row for key, row in self._get_student_search_index()
+                    if text in key and (not belt or row[5] == belt)]
         except Exception as e:
-            print(f"Error loading students: {e}")
+            logger.error("Error searching students: %s", e)
             return []
     
+    def create_student(self, **kwargs):
+        """Create a student"""
+        with self.session() as db:
+            return StudentController(db).create_student(**kwargs)
+    
+    def update_student(self, student_id, **kwargs):
+        """Update a student"""
+        with self.session() as db:
+            return StudentController(db).update_student(student_id, **kwargs)
+    
+    def deactivate_students(self, student_ids):
+        """Deactivate students"""
+        with self.session() as db:
+            controller = StudentController(db)
+            for student_id in student_ids:
+                controller.deactivate_student(student_id)
+    
+    def _load_trainings_rows(self):
+        """Query trainings and convert them to treeview values"""
+        # Trainer names and attendance counts come from the same query
+        with self.session() as db:
+            trainings = TrainingController(db).get_training_rows()
+        return [(training_id, date.strftime("%Y-%m-%d"),
+                f"{first_name} {last_name}" if first_name is not None else "Unknown",
+                attendance_count, notes or "")
+                for training_id, date, first_name, last_name, attendance_count, notes in trainings]
+    
+    def _load_payments_rows(self):
+        """Query payments and convert them to treeview values"""
+        with self.session() as db:
+            payments = PaymentController(db).iter_payment_rows()
+            return [(payment_id, f"{first_name} {last_name}",
+                    amount, payment_type,
+                    payment_date.strftime("%Y-%m-%d") if payment_date else "",
+                    description or "")
+                    for payment_id, first_name, last_name, amount, payment_type, payment_date, description
+                    in payments]
+    
+    def count_rows(self):
+        """Count active students and trainings in the database"""
+        try:
+            with self.session() as db:
+                return StudentController(db).count_active_students(), TrainingController(db).count_trainings()
+        except Exception as e:
+            logger.error("Error counting rows: %s", e)
+            return 0, 0
+    
     def load_trainings_data(self):
         """Load trainings from database"""
         try:
-            trainings = self.training_controller.get_all_trainings()
-            return [(t.id, t.date.strftime("%Y-%m-%d"), 
-                    f"{t.trainer.first_name} {t.trainer.last_name}" if t.trainer else "Unknown",
-                    len(t.attendances), t.notes or "") 
-                    for t in trainings]
+            return self._cached('trainings', self._load_trainings_rows)
         except Exception as e:
-            print(f"Error loading trainings: {e}")
+            logger.error("Error loading trainings: %s", e)
             return []
     
     def load_payments_data(self):
         """Load payments from database"""
         try:
-            payments = self.db.query(Payment).join(Student).all()
-            return [(p.id, f"{p.student.first_name} {p.student.last_name}", 
-                    p.amount, p.payment_type, 
-                    p.payment_date.strftime("%Y-%m-%d") if p.payment_date else "",
-                    p.description or "") 
-                    for p in payments]
+            return self._cached('payments', self._load_payments_rows)
         except Exception as e:
-            print(f"Error loading payments: {e}")
+            logger.error("Error loading payments: %s", e)
             return []
 
 
+class StatusBar(ttk.Label):
+    """Bottom line for success messages that would otherwise need a modal dialog"""
+    
+    def __init__(self, parent):
+        super().__init__(parent, anchor=tk.W, padding=(10, 2))
+        self._clear_job = None
+    
+    def show(self, message):
+        """Show a message for STATUS_CLEAR_MS"""
+        if self._clear_job:
+            self.after_cancel(self._clear_job)
+        self.config(text=message)
+        self._clear_job = self.after(STATUS_CLEAR_MS, self._clear)
+    
+    def _clear(self):
+        """Remove the message"""
+        self._clear_job = None
+        self.config(text="")
+
+
 def create_main_interface(root):
     """Create main interface"""
     # Create data manager and clipboard service
     data_manager = DataManager()
     clipboard_service = ClipboardService(root)
     
+    def close_app():
+        """Release database resources and close the main window"""
+        data_manager.close()
+        root.destroy()
+    
+    root.protocol("WM_DELETE_WINDOW", close_app)
+    
+    # Status bar, packed before the notebook so it keeps its place at the bottom
+    status_bar = StatusBar(root)
+    status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    
     # Global variable to track active treeview
     active_treeview = None
     
@@ -98,12 +424,7 @@ def create_main_interface(root):
     
     def quick_backup():
         """Create quick backup"""
-        try:
-            backup_service = BackupService()
-            backup_path = backup_service.create_backup(include_files=False)
-            messagebox.showinfo("✅ Успех", f"Быстрый бэкап создан:\n{backup_path}")
-        except Exception as e:
-            messagebox.showerror("❌ Ошибка", f"Ошибка создания бэкапа: {e}")
+        start_backup(root, data_manager, "Быстрый бэкап создан", "Ошибка создания бэкапа")
     
     def open_backup_manager():
         """Open backup management dialog"""
@@ -134,13 +455,8 @@ def create_main_interface(root):
                                 # Refresh students data
                                 for widget in tab_frame.winfo_children():
                                     if isinstance(widget, ttk.Treeview):
-                                        # Clear and reload data
-                                        for item in widget.get_children():
-                                            widget.delete(item)
                                         # Reload data from database
-                                        students_data = data_manager.load_students_data()
-                                        for student in students_data:
-                                            widget.insert("", tk.END, values=student)
+                                        load_tree_async(widget, data_manager, data_manager.load_students_data)
                                         break
                                 break
                         break
@@ -155,7 +471,7 @@ def create_main_interface(root):
     file_menu.add_command(label="📊 Экспорт/Импорт данных", command=open_export_import)
     file_menu.add_command(label="📥 Импорт учеников из CSV", command=open_csv_import)
     file_menu.add_separator()
-    file_menu.add_command(label="❌ Выход", command=root.quit)
+    file_menu.add_command(label="❌ Выход", command=close_app)
     
     # Edit menu
     edit_menu = tk.Menu(menubar, tearoff=0)
@@ -166,7 +482,7 @@ def create_main_interface(root):
         try:
             if active_treeview:
                 clipboard_service.copy_table_to_clipboard(active_treeview, include_headers=False)
-                messagebox.showinfo("✅ Успех", "Данные скопированы в буфер обмена!")
+                status_bar.show("✅ Данные скопированы в буфер обмена!")
             else:
                 messagebox.showwarning("⚠️ Предупреждение", "Выберите таблицу для копирования")
         except Exception as e:
@@ -177,7 +493,7 @@ def create_main_interface(root):
         try:
             if active_treeview:
                 clipboard_service.paste_from_clipboard_to_table(active_treeview)
-                messagebox.showinfo("✅ Успех", "Данные вставлены из буфера обмена!")
+                status_bar.show("✅ Данные вставлены из буфера обмена!")
             else:
                 messagebox.showwarning("⚠️ Предупреждение", "Выберите таблицу для вставки")
         except Exception as e:
@@ -186,7 +502,7 @@ def create_main_interface(root):
     def clear_clipboard():
         """Clear clipboard"""
         clipboard_service.clear_clipboard()
-        messagebox.showinfo("✅ Успех", "Буфер обмена очищен!")
+        status_bar.show("✅ Буфер обмена очищен!")
     
     edit_menu.add_command(label="📋 Копировать", command=copy_to_clipboard)
     edit_menu.add_command(label="📥 Вставить", command=paste_from_clipboard)
@@ -198,11 +514,12 @@ def create_main_interface(root):
         if active_treeview:
             all_items = active_treeview.get_children()
             active_treeview.selection_set(all_items)
-            messagebox.showinfo("✅ Успех", f"Выделено {len(all_items)} элементов")
+            status_bar.show(f"✅ Выделено {len(all_items)} элементов")
         else:
             messagebox.showwarning("⚠️ Предупреждение", "Выберите таблицу для выделения")
     
-    # Note: Global shortcuts removed - using local shortcuts on each treeview instead
+    # Table shortcuts: one class binding shared by every treeview
+    DataTab.bind_shortcuts(root)
     
     # Create notebook for tabs
     notebook = ttk.Notebook(root)
@@ -211,95 +528,174 @@ def create_main_interface(root):
     # Students tab
     students_frame = ttk.Frame(notebook)
     notebook.add(students_frame, text="Ученики")
-    create_students_tab(students_frame, clipboard_service, set_active_treeview, data_manager)
+    create_students_tab(students_frame, clipboard_service, set_active_treeview, data_manager, status_bar)
     
     # Trainings tab
     trainings_frame = ttk.Frame(notebook)
     notebook.add(trainings_frame, text="Тренировки")
-    create_trainings_tab(trainings_frame, clipboard_service, set_active_treeview, data_manager)
+    create_trainings_tab(trainings_frame, clipboard_service, set_active_treeview, data_manager, status_bar)
     
     # Payments tab
     payments_frame = ttk.Frame(notebook)
     notebook.add(payments_frame, text="Платежи")
-    create_payments_tab(payments_frame, clipboard_service, set_active_treeview, data_manager)
+    create_payments_tab(payments_frame, clipboard_service, set_active_treeview, data_manager, status_bar)
     
     # Reports tab
     reports_frame = ttk.Frame(notebook)
     notebook.add(reports_frame, text="Отчеты")
-    create_reports_tab(reports_frame, clipboard_service, set_active_treeview, data_manager)
     
     # Settings tab
     settings_frame = ttk.Frame(notebook)
     notebook.add(settings_frame, text="Настройки")
-    create_settings_tab(settings_frame)
+    
+    # Reports and settings are built when first selected
+    tab_builders = {
+        str(reports_frame): partial(create_reports_tab, reports_frame, clipboard_service, set_active_treeview, data_manager),
+        str(settings_frame): partial(create_settings_tab, settings_frame, data_manager),
+    }
+    
+    def build_selected_tab(event):
+        """Build the selected tab's contents on first selection"""
+        builder = tab_builders.pop(notebook.select(), None)
+        if builder:
+            builder()
+    
+    notebook.bind('<<NotebookTabChanged>>', build_selected_tab)
 
 
-def create_students_tab(parent, clipboard_service, set_active_treeview, data_manager):
-    """Create students management tab"""
-    # Search frame
-    search_frame = ttk.LabelFrame(parent, text="Поиск и фильтры")
-    search_frame.pack(fill=tk.X, padx=5, pady=5)
+class DataTab:
+    """Tab with a search bar, a sortable treeview with clipboard shortcuts and a row of buttons"""
     
-    ttk.Label(search_frame, text="Поиск:").pack(side=tk.LEFT, padx=5)
-    search_entry = ttk.Entry(search_frame)
-    search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+    # event.state bits of Control and of Mod1, which is Command on Mac but NumLock on Windows and Alt on X11
+    CONTROL_STATE = 0x4
+    MOD1_STATE = 0x8
     
-    ttk.Label(search_frame, text="Пояс:").pack(side=tk.LEFT, padx=5)
-    belt_combo = ttk.Combobox(search_frame, values=["Все", "White", "Blue", "Purple", "Brown", "Black"])
+    # Modifier bits that trigger a shortcut; Mod1 is added on Mac by bind_shortcuts
+    SHORTCUT_STATE_MASK = CONTROL_STATE
+    
+    # Method run for each shortcut key
+    SHORTCUTS = {'c': 'copy', 'v': 'paste', 'a': 'select_all'}
+    
+    # Tabs by treeview path, for the class-level shortcut binding
+    by_tree = {}
+    
+    def __init__(self, parent, title, columns, item_label, loader, data_manager,
+                 clipboard_service, set_active_treeview, status_bar, column_width=120):
+        self.item_label = item_label
+        self.status_bar = status_bar
+        self.loader = loader
+        self.data_manager = data_manager
+        self.clipboard_service = clipboard_service
+        
+        # Search frame
+        self.search_frame = ttk.LabelFrame(parent, text=title)
+        self.search_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(self.search_frame, text="Поиск:").pack(side=tk.LEFT, padx=5)
+        self.search_entry = ttk.Entry(self.search_frame)
+        self.search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        
+        # Table
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15, selectmode='extended')
+        
+        # Configure columns with sorting
+        for col in columns:
+            self.tree.heading(col, text=col, command=partial(sort_tree_column, self.tree, col))
+            self.tree.column(col, width=column_width)
+        
+        # Add scrollbar
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        
+        # Pack treeview and scrollbar
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Add context menu for clipboard operations
+        create_context_menu(parent, self.tree, clipboard_service)
+        
+        # Track the active table for clipboard operations; clicking a treeview focuses it,
+        # so FocusIn covers clicks too and runs only when focus actually changes
+        self.tree.bind('<FocusIn>', lambda e: set_active_treeview(self.tree))
+        
+        # Keyboard shortcuts come from the Treeview class binding (see dispatch_shortcut)
+        DataTab.by_tree[str(self.tree)] = self
+        
+        # Buttons frame
+        self.buttons_frame = ttk.Frame(parent)
+        self.buttons_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        # Load data from database
+        self.refresh()
+    
+    @classmethod
+    def bind_shortcuts(cls, root):
+        """Bind the table shortcuts for every treeview, with the modifier of this platform"""
+        if root.tk.call('tk', 'windowingsystem') == 'aqua':
+            cls.SHORTCUT_STATE_MASK = cls.CONTROL_STATE | cls.MOD1_STATE
+        else:
+            cls.SHORTCUT_STATE_MASK = cls.CONTROL_STATE
+        root.bind_class('Treeview', '<KeyPress>', cls.dispatch_shortcut)
+    
+    @classmethod
+    def dispatch_shortcut(cls, event):
+        """Run the copy/paste/select-all action of the tab whose table got a modifier key press"""
+        if event.state & cls.SHORTCUT_STATE_MASK:
+            tab = cls.by_tree.get(str(event.widget))
+            action = cls.SHORTCUTS.get(event.keysym.lower())
+            if tab and action:
+                getattr(tab, action)()
+    
+    def add_button(self, text, command):
+        """Add a button to the buttons row"""
+        ttk.Button(self.buttons_frame, text=text, command=command).pack(side=tk.LEFT, padx=5)
+    
+    def refresh(self):
+        """Reload table rows from database"""
+        load_tree_async(self.tree, self.data_manager, self.loader)
+    
+    def copy(self):
+        """Copy selected rows to clipboard"""
+        self.clipboard_service.copy_table_to_clipboard(self.tree, include_headers=False)
+        self.status_bar.show(f"✅ Данные {self.item_label} скопированы!")
+    
+    def paste(self):
+        """Paste rows from clipboard"""
+        self.clipboard_service.paste_from_clipboard_to_table(self.tree)
+        self.status_bar.show(f"✅ Данные вставлены в таблицу {self.item_label}!")
+    
+    def select_all(self):
+        """Select all rows"""
+        all_items = self.tree.get_children()
+        self.tree.selection_set(all_items)
+        self.status_bar.show(f"✅ Выделено {len(all_items)} {self.item_label}")
+
+
+def create_students_tab(parent, clipboard_service, set_active_treeview, data_manager, status_bar):
+    """Create students management tab"""
+    tab = DataTab(parent, "Поиск и фильтры",
+                  ("ID", "Имя", "Фамилия", "Телефон", "Telegram", "Пояс", "Дата регистрации"),
+                  "учеников", data_manager.load_students_data, data_manager,
+                  clipboard_service, set_active_treeview, status_bar)
+    students_tree = tab.tree
+    search_entry = tab.search_entry
+    
+    ttk.Label(tab.search_frame, text="Пояс:").pack(side=tk.LEFT, padx=5)
+    belt_combo = ttk.Combobox(tab.search_frame, values=("Все",) + BELTS)
     belt_combo.pack(side=tk.LEFT, padx=5)
     belt_combo.set("Все")
     
     # Filter button
-    filter_btn = ttk.Button(search_frame, text="🔍 Фильтровать")
+    filter_btn = ttk.Button(tab.search_frame, text="🔍 Фильтровать")
     filter_btn.pack(side=tk.LEFT, padx=5)
     
     # Clear filter button
-    clear_btn = ttk.Button(search_frame, text="🗑️ Очистить")
+    clear_btn = ttk.Button(tab.search_frame, text="🗑️ Очистить")
     clear_btn.pack(side=tk.LEFT, padx=5)
     
-    # Students table
-    table_frame = ttk.Frame(parent)
-    table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    # Create treeview for students with multiple selection
-    columns = ("ID", "Имя", "Фамилия", "Телефон", "Telegram", "Пояс", "Дата регистрации")
-    students_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15, selectmode='extended')
-    
-    # Configure columns with sorting
-    def sort_column(col, reverse=False):
-        """Sort treeview by column"""
-        data = [(students_tree.set(child, col), child) for child in students_tree.get_children('')]
-        data.sort(reverse=reverse)
-        
-        # Rearrange items in sorted positions
-        for index, (val, child) in enumerate(data):
-            students_tree.move(child, '', index)
-        
-        # Reverse sort next time
-        students_tree.heading(col, command=lambda: sort_column(col, not reverse))
-    
-    for col in columns:
-        students_tree.heading(col, text=col, command=lambda c=col: sort_column(c))
-        students_tree.column(col, width=120)
-    
-    # Add scrollbar
-    scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=students_tree.yview)
-    students_tree.configure(yscrollcommand=scrollbar.set)
-    
-    # Pack treeview and scrollbar
-    students_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    # Add context menu for clipboard operations
-    create_context_menu(parent, students_tree, clipboard_service)
-    
-    # Add focus tracking for clipboard operations
-    def on_treeview_focus(event):
-        set_active_treeview(students_tree)
-    
-    students_tree.bind('<FocusIn>', on_treeview_focus)
-    students_tree.bind('<Button-1>', lambda e: set_active_treeview(students_tree))
-    
     # Enable cell editing
     def start_edit(event):
         """Start editing cell on double-click"""
@@ -312,162 +708,133 @@ def create_students_tab(parent, clipboard_service, set_active_treeview, data_man
                 if col_index >= 0:  # Skip the tree column
                     edit_cell(item, col_index)
     
+    # One entry widget, placed over the cell being edited
+    edit_entry = tk.Entry(students_tree)
+    # (item, column, row values) of the cell being edited
+    editing = None
+    
     def edit_cell(item, column):
         """Edit a specific cell"""
+        nonlocal editing
         # Get current value
         values = list(students_tree.item(item)['values'])
         current_value = values[column] if column < len(values) else ""
         
-        # Create entry widget for editing
+        # Move the entry widget over the cell
         bbox = students_tree.bbox(item, column)
         if bbox:
-            edit_entry = tk.Entry(students_tree)
-            edit_entry.place(x=bbox[0], y=bbox[1], width=bbox[2], height=bbox[3])
+            editing = (item, column, values)
+            edit_entry.delete(0, tk.END)
             edit_entry.insert(0, str(current_value))
+            edit_entry.place(x=bbox[0], y=bbox[1], width=bbox[2], height=bbox[3])
             edit_entry.select_range(0, tk.END)
             edit_entry.focus()
+    
+    def finish_edit():
+        """Hide the entry widget and return focus to the table"""
+        nonlocal editing
+        editing = None
+        edit_entry.place_forget()
+        students_tree.focus_set()
+    
+    def save_edit(event=None):
+        """Save edited value"""
+        if editing is None:
+            return
+        item, column, values = editing
+        if students_tree.exists(item):
+            values[column] = edit_entry.get()
+            students_tree.item(item, values=values)
             
-            def save_edit(event=None):
-                """Save edited value"""
-                new_value = edit_entry.get()
-                values[column] = new_value
-                students_tree.item(item, values=values)
-                
-                # Update original_data
-                for i, data in enumerate(original_data):
-                    if data[0] == values[0]:  # Match by ID
-                        original_data[i] = tuple(values)
-                        break
-                
-                edit_entry.destroy()
-            
-            def cancel_edit(event=None):
-                """Cancel editing"""
-                edit_entry.destroy()
-            
-            edit_entry.bind('<Return>', save_edit)
-            edit_entry.bind('<Escape>', cancel_edit)
-            edit_entry.bind('<FocusOut>', save_edit)
+            # Keep the edit when the filter redraws the table from the cached rows
+            data_manager.replace_cached_student_row(values)
+        
+        finish_edit()
+    
+    def cancel_edit(event=None):
+        """Cancel editing"""
+        if editing is not None:
+            finish_edit()
+    
+    edit_entry.bind('<Return>', save_edit)
+    edit_entry.bind('<Escape>', cancel_edit)
+    edit_entry.bind('<FocusOut>', save_edit)
     
     # Bind double-click to start editing
     students_tree.bind('<Double-1>', start_edit)
     
-    # Load data from database
-    original_data = data_manager.load_students_data()
-    
     # Filter functions
-    def apply_filter():
-        """Apply search and belt filter"""
-        search_text = search_entry.get().lower()
+    def show_filtered(on_loaded=None):
+        """Show rows matching search and belt filter"""
         selected_belt = belt_combo.get()
+        search = partial(data_manager.search_students_data, search_entry.get(),
+                         None if selected_belt == "Все" else selected_belt)
         
-        # Clear current items
-        for item in students_tree.get_children():
-            students_tree.delete(item)
-        
-        # Filter and add items
-        filtered_count = 0
-        for item_data in original_data:
-            # Check search criteria (name, surname, phone, telegram)
-            matches_search = (
-                search_text == "" or
-                search_text in str(item_data[1]).lower() or  # name
-                search_text in str(item_data[2]).lower() or  # surname
-                search_text in str(item_data[3]).lower() or  # phone
-                search_text in str(item_data[4]).lower()     # telegram
-            )
-            
-            # Check belt filter
-            matches_belt = (
-                selected_belt == "Все" or
-                selected_belt == str(item_data[5])  # belt
-            )
-            
-            if matches_search and matches_belt:
-                students_tree.insert('', 'end', values=item_data)
-                filtered_count += 1
-        
-        messagebox.showinfo("🔍 Фильтр", f"Найдено записей: {filtered_count}")
+        # Filtering is in memory, but the rows are reloaded off the Tk thread after a data change;
+        # the current rows stay visible meanwhile
+        load_tree_async(students_tree, data_manager, search, on_loaded, placeholder=False)
+    
+    def report_found(rows):
+        """Show how many rows the filter found"""
+        tab.status_bar.show(f"🔍 Найдено записей: {len(rows)}")
+    
+    def apply_filter():
+        """Apply search and belt filter"""
+        cancel_live_filter()
+        show_filtered(report_found)
+    
+    # Pending live filter callback
+    live_filter_job = None
+    
+    def cancel_live_filter():
+        """Cancel a scheduled live filter"""
+        nonlocal live_filter_job
+        if live_filter_job:
+            search_entry.after_cancel(live_filter_job)
+            live_filter_job = None
+    
+    def run_live_filter():
+        """Filter once typing pauses"""
+        nonlocal live_filter_job
+        live_filter_job = None
+        show_filtered()
+    
+    def schedule_live_filter(event):
+        """Restart the live filter delay on every key release"""
+        nonlocal live_filter_job
+        if event.keysym in ('Return', 'KP_Enter'):
+            return
+        cancel_live_filter()
+        live_filter_job = search_entry.after(LIVE_FILTER_DELAY_MS, run_live_filter)
     
     def clear_filter():
         """Clear all filters and show all data"""
+        cancel_live_filter()
         search_entry.delete(0, tk.END)
         belt_combo.set("Все")
         
         # Reload data from database
-        nonlocal original_data
-        original_data = data_manager.load_students_data()
-        
-        # Clear and repopulate
-        for item in students_tree.get_children():
-            students_tree.delete(item)
-        
-        for item_data in original_data:
-            students_tree.insert('', 'end', values=item_data)
+        tab.refresh()
         
-        messagebox.showinfo("🗑️ Очистка", "Фильтры очищены")
+        tab.status_bar.show("🗑️ Фильтры очищены")
     
     # Bind filter functions
     filter_btn.config(command=apply_filter)
     clear_btn.config(command=clear_filter)
     
-    # Bind Enter key to search
+    # Bind Enter key to search, and filter live while typing
     search_entry.bind('<Return>', lambda e: apply_filter())
-    
-    # Define keyboard shortcut functions
-    def copy_students():
-        print("DEBUG: copy_students called")  # Debug
-        clipboard_service.copy_table_to_clipboard(students_tree, include_headers=False)
-        messagebox.showinfo("✅ Успех", "Данные учеников скопированы!")
-    
-    def paste_students():
-        print("DEBUG: paste_students called")  # Debug
-        clipboard_service.paste_from_clipboard_to_table(students_tree)
-        messagebox.showinfo("✅ Успех", "Данные вставлены в таблицу учеников!")
-    
-    def select_all_students_shortcut():
-        print("DEBUG: select_all_students_shortcut called")  # Debug
-        all_items = students_tree.get_children()
-        students_tree.selection_set(all_items)
-        messagebox.showinfo("✅ Успех", f"Выделено {len(all_items)} учеников")
-    
-    # Bind keyboard shortcuts to students tree (Mac and Windows/Linux)
-    print("DEBUG: Binding keyboard shortcuts to students_tree")  # Debug
-    
-    # Windows/Linux shortcuts
-    students_tree.bind('<Control-c>', lambda e: copy_students(), add=True)
-    students_tree.bind('<Control-v>', lambda e: paste_students(), add=True)
-    students_tree.bind('<Control-a>', lambda e: select_all_students_shortcut(), add=True)
-    
-    # Mac shortcuts
-    students_tree.bind('<Command-c>', lambda e: copy_students(), add=True)
-    students_tree.bind('<Command-v>', lambda e: paste_students(), add=True)
-    students_tree.bind('<Command-a>', lambda e: select_all_students_shortcut(), add=True)
-    
-    # Alternative Mac shortcuts (some systems use different key names)
-    students_tree.bind('<Meta-c>', lambda e: copy_students(), add=True)
-    students_tree.bind('<Meta-v>', lambda e: paste_students(), add=True)
-    students_tree.bind('<Meta-a>', lambda e: select_all_students_shortcut(), add=True)
-    
-    print("DEBUG: Keyboard shortcuts bound successfully")  # Debug
-    
-    # Load and display data from database
-    for item_data in original_data:
-        students_tree.insert("", tk.END, values=item_data)
-    
-    # Buttons frame
-    buttons_frame = ttk.Frame(parent)
-    buttons_frame.pack(fill=tk.X, padx=5, pady=5)
+    search_entry.bind('<KeyRelease>', schedule_live_filter)
     
     # Create button handlers
     def add_student():
-        show_add_student_dialog(parent, data_manager, refresh_students)
+        show_student_dialog(parent, data_manager, tab.status_bar, refresh_students)
     
     def edit_student():
         selection = students_tree.selection()
         if selection:
             student_data = students_tree.item(selection[0])['values']
-            show_edit_student_dialog(parent, student_data, data_manager, refresh_students)
+            show_student_dialog(parent, data_manager, tab.status_bar, refresh_students, initial=student_data)
         else:
             messagebox.showwarning("Предупреждение", "Выберите ученика для редактирования")
     
@@ -491,16 +858,15 @@ def create_students_tab(parent, clipboard_service, set_active_treeview, data_man
                         ids_to_delete.append(item_data[0])  # ID is first column
                     
                     # Delete from database
-                    for student_id in ids_to_delete:
-                        data_manager.student_controller.deactivate_student(student_id)
+                    data_manager.deactivate_students(ids_to_delete)
                     
                     # Refresh the display
                     refresh_students()
                     
                     if count == 1:
-                        tk.messagebox.showinfo("Успех", "Ученик удален")
+                        tab.status_bar.show("Ученик удален")
                     else:
-                        tk.messagebox.showinfo("Успех", f"Удалено {count} учеников")
+                        tab.status_bar.show(f"Удалено {count} учеников")
                 except Exception as e:
                     tk.messagebox.showerror("Ошибка", f"Не удалось удалить ученика: {e}")
         else:
@@ -508,15 +874,7 @@ def create_students_tab(parent, clipboard_service, set_active_treeview, data_man
     
     def refresh_students():
         """Refresh students data from database"""
-        nonlocal original_data
-        original_data = data_manager.load_students_data()
-        
-        # Clear and repopulate treeview
-        for item in students_tree.get_children():
-            students_tree.delete(item)
-        
-        for item_data in original_data:
-            students_tree.insert("", tk.END, values=item_data)
+        tab.refresh()
     
     def view_details():
         selection = students_tree.selection()
@@ -526,275 +884,45 @@ def create_students_tab(parent, clipboard_service, set_active_treeview, data_man
         else:
             messagebox.showwarning("Предупреждение", "Выберите ученика для просмотра")
     
-    def select_all_students():
-        all_items = students_tree.get_children()
-        students_tree.selection_set(all_items)
-        messagebox.showinfo("✅ Успех", f"Выделено {len(all_items)} учеников")
-    
     # Create buttons
-    ttk.Button(buttons_frame, text="➕ Добавить ученика", command=add_student).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="✏️ Редактировать", command=edit_student).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="🗑️ Удалить", command=delete_student).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="👁️ Подробности", command=view_details).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="✅ Выделить все", command=select_all_students).pack(side=tk.LEFT, padx=5)
+    tab.add_button("➕ Добавить ученика", add_student)
+    tab.add_button("✏️ Редактировать", edit_student)
+    tab.add_button("🗑️ Удалить", delete_student)
+    tab.add_button("👁️ Подробности", view_details)
+    tab.add_button("✅ Выделить все", tab.select_all)
 
 
-def create_trainings_tab(parent, clipboard_service, set_active_treeview, data_manager):
+def create_trainings_tab(parent, clipboard_service, set_active_treeview, data_manager, status_bar):
     """Create trainings management tab"""
-    # Search frame
-    search_frame = ttk.LabelFrame(parent, text="Поиск тренировок")
-    search_frame.pack(fill=tk.X, padx=5, pady=5)
-    
-    ttk.Label(search_frame, text="Поиск:").pack(side=tk.LEFT, padx=5)
-    search_entry = ttk.Entry(search_frame)
-    search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-    
-    # Trainings table
-    table_frame = ttk.Frame(parent)
-    table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    columns = ("ID", "Дата", "Тренер", "Количество учеников", "Заметки")
-    trainings_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15, selectmode='extended')
-    
-    # Configure columns with sorting
-    def sort_trainings_column(col, reverse=False):
-        """Sort trainings treeview by column"""
-        data = [(trainings_tree.set(child, col), child) for child in trainings_tree.get_children('')]
-        data.sort(reverse=reverse)
-        
-        for index, (val, child) in enumerate(data):
-            trainings_tree.move(child, '', index)
-        
-        trainings_tree.heading(col, command=lambda: sort_trainings_column(col, not reverse))
-    
-    for col in columns:
-        trainings_tree.heading(col, text=col, command=lambda c=col: sort_trainings_column(c))
-        trainings_tree.column(col, width=150)
-    
-    # Add scrollbar
-    scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=trainings_tree.yview)
-    trainings_tree.configure(yscrollcommand=scrollbar.set)
-    
-    # Pack treeview and scrollbar
-    trainings_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    # Add context menu for clipboard operations
-    create_context_menu(parent, trainings_tree, clipboard_service)
-    
-    # Add focus tracking for clipboard operations
-    def on_treeview_focus(event):
-        set_active_treeview(trainings_tree)
-    
-    trainings_tree.bind('<FocusIn>', on_treeview_focus)
-    trainings_tree.bind('<Button-1>', lambda e: set_active_treeview(trainings_tree))
-    
-    # Define keyboard shortcut functions
-    def copy_trainings():
-        clipboard_service.copy_table_to_clipboard(trainings_tree, include_headers=False)
-        messagebox.showinfo("✅ Успех", "Данные тренировок скопированы!")
-    
-    def paste_trainings():
-        clipboard_service.paste_from_clipboard_to_table(trainings_tree)
-        messagebox.showinfo("✅ Успех", "Данные вставлены в таблицу тренировок!")
-    
-    def select_all_trainings_shortcut():
-        all_items = trainings_tree.get_children()
-        trainings_tree.selection_set(all_items)
-        messagebox.showinfo("✅ Успех", f"Выделено {len(all_items)} тренировок")
-    
-    # Bind keyboard shortcuts to trainings tree (Mac and Windows/Linux)
-    trainings_tree.bind('<Control-c>', lambda e: copy_trainings(), add=True)
-    trainings_tree.bind('<Control-v>', lambda e: paste_trainings(), add=True)
-    trainings_tree.bind('<Control-a>', lambda e: select_all_trainings_shortcut(), add=True)
-    # Mac shortcuts
-    trainings_tree.bind('<Command-c>', lambda e: copy_trainings(), add=True)
-    trainings_tree.bind('<Command-v>', lambda e: paste_trainings(), add=True)
-    trainings_tree.bind('<Command-a>', lambda e: select_all_trainings_shortcut(), add=True)
-    
-    # Load data from database
-    trainings_data = data_manager.load_trainings_data()
-    
-    # Clear existing data and add real data
-    for item in trainings_tree.get_children():
-        trainings_tree.delete(item)
-    
-    for training in trainings_data:
-        trainings_tree.insert("", tk.END, values=training)
-    
-    # Buttons frame
-    buttons_frame = ttk.Frame(parent)
-    buttons_frame.pack(fill=tk.X, padx=5, pady=5)
-    
-    def add_training():
-        messagebox.showinfo("Информация", "Функция добавления тренировки")
-    
-    def edit_training():
-        messagebox.showinfo("Информация", "Функция редактирования тренировки")
-    
-    def mark_attendance():
-        messagebox.showinfo("Информация", "Функция отметки посещаемости")
-    
-    def view_attendance():
-        messagebox.showinfo("Информация", "Функция просмотра посещаемости")
-    
-    ttk.Button(buttons_frame, text="➕ Добавить тренировку", command=add_training).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="✏️ Редактировать", command=edit_training).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="✅ Отметить посещаемость", command=mark_attendance).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="👁️ Посещаемость", command=view_attendance).pack(side=tk.LEFT, padx=5)
+    tab = DataTab(parent, "Поиск тренировок", ("ID", "Дата", "Тренер", "Количество учеников", "Заметки"),
+                  "тренировок", data_manager.load_trainings_data, data_manager,
+                  clipboard_service, set_active_treeview, status_bar, column_width=150)
+    
+    tab.add_button("➕ Добавить тренировку", partial(messagebox.showinfo, "Информация", "Функция добавления тренировки"))
+    tab.add_button("✏️ Редактировать", partial(messagebox.showinfo, "Информация", "Функция редактирования тренировки"))
+    tab.add_button("✅ Отметить посещаемость", partial(messagebox.showinfo, "Информация", "Функция отметки посещаемости"))
+    tab.add_button("👁️ Посещаемость", partial(messagebox.showinfo, "Информация", "Функция просмотра посещаемости"))
 
 
-def create_payments_tab(parent, clipboard_service, set_active_treeview, data_manager):
+def create_payments_tab(parent, clipboard_service, set_active_treeview, data_manager, status_bar):
     """Create payments management tab"""
-    # Search frame
-    search_frame = ttk.LabelFrame(parent, text="Поиск платежей")
-    search_frame.pack(fill=tk.X, padx=5, pady=5)
-    
-    ttk.Label(search_frame, text="Поиск:").pack(side=tk.LEFT, padx=5)
-    search_entry = ttk.Entry(search_frame)
-    search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-    
-    # Payments table
-    table_frame = ttk.Frame(parent)
-    table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    columns = ("ID", "Ученик", "Сумма", "Тип", "Дата", "Описание")
-    payments_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=15, selectmode='extended')
-    
-    # Configure columns with sorting
-    def sort_payments_column(col, reverse=False):
-        """Sort payments treeview by column"""
-        data = [(payments_tree.set(child, col), child) for child in payments_tree.get_children('')]
-        data.sort(reverse=reverse)
-        
-        for index, (val, child) in enumerate(data):
-            payments_tree.move(child, '', index)
-        
-        payments_tree.heading(col, command=lambda: sort_payments_column(col, not reverse))
-    
-    for col in columns:
-        payments_tree.heading(col, text=col, command=lambda c=col: sort_payments_column(c))
-        payments_tree.column(col, width=120)
-    
-    # Add scrollbar
-    scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=payments_tree.yview)
-    payments_tree.configure(yscrollcommand=scrollbar.set)
-    
-    # Pack treeview and scrollbar
-    payments_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-    
-    # Add context menu for clipboard operations
-    create_context_menu(parent, payments_tree, clipboard_service)
-    
-    # Add focus tracking for clipboard operations
-    def on_treeview_focus(event):
-        set_active_treeview(payments_tree)
-    
-    payments_tree.bind('<FocusIn>', on_treeview_focus)
-    payments_tree.bind('<Button-1>', lambda e: set_active_treeview(payments_tree))
-    
-    # Define keyboard shortcut functions
-    def copy_payments():
-        clipboard_service.copy_table_to_clipboard(payments_tree, include_headers=False)
-        messagebox.showinfo("✅ Успех", "Данные платежей скопированы!")
-    
-    def paste_payments():
-        clipboard_service.paste_from_clipboard_to_table(payments_tree)
-        messagebox.showinfo("✅ Успех", "Данные вставлены в таблицу платежей!")
-    
-    def select_all_payments_shortcut():
-        all_items = payments_tree.get_children()
-        payments_tree.selection_set(all_items)
-        messagebox.showinfo("✅ Успех", f"Выделено {len(all_items)} платежей")
-    
-    # Bind keyboard shortcuts to payments tree (Mac and Windows/Linux)
-    payments_tree.bind('<Control-c>', lambda e: copy_payments(), add=True)
-    payments_tree.bind('<Control-v>', lambda e: paste_payments(), add=True)
-    payments_tree.bind('<Control-a>', lambda e: select_all_payments_shortcut(), add=True)
-    # Mac shortcuts
-    payments_tree.bind('<Command-c>', lambda e: copy_payments(), add=True)
-    payments_tree.bind('<Command-v>', lambda e: paste_payments(), add=True)
-    payments_tree.bind('<Command-a>', lambda e: select_all_payments_shortcut(), add=True)
-    
-    # Load data from database
-    payments_data = data_manager.load_payments_data()
-    
-    # Clear existing data and add real data
-    for item in payments_tree.get_children():
-        payments_tree.delete(item)
-    
-    for payment in payments_data:
-        payments_tree.insert("", tk.END, values=payment)
-    
-    # Buttons frame
-    buttons_frame = ttk.Frame(parent)
-    buttons_frame.pack(fill=tk.X, padx=5, pady=5)
-    
-    def add_payment():
-        messagebox.showinfo("Информация", "Функция добавления платежа")
-    
-    def edit_payment():
-        messagebox.showinfo("Информация", "Функция редактирования платежа")
-    
-    def delete_payment():
-        messagebox.showinfo("Информация", "Функция удаления платежа")
-    
-    def generate_report():
-        messagebox.showinfo("Информация", "Функция генерации отчета")
-    
-    ttk.Button(buttons_frame, text="➕ Добавить платеж", command=add_payment).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="✏️ Редактировать", command=edit_payment).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="🗑️ Удалить", command=delete_payment).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="📊 Отчет", command=generate_report).pack(side=tk.LEFT, padx=5)
+    tab = DataTab(parent, "Поиск платежей", ("ID", "Ученик", "Сумма", "Тип", "Дата", "Описание"),
+                  "платежей", data_manager.load_payments_data, data_manager,
+                  clipboard_service, set_active_treeview, status_bar)
+    
+    tab.add_button("➕ Добавить платеж", partial(messagebox.showinfo, "Информация", "Функция добавления платежа"))
+    tab.add_button("✏️ Редактировать", partial(messagebox.showinfo, "Информация", "Функция редактирования платежа"))
+    tab.add_button("🗑️ Удалить", partial(messagebox.showinfo, "Информация", "Функция удаления платежа"))
+    tab.add_button("📊 Отчет", partial(messagebox.showinfo, "Информация", "Функция генерации отчета"))
 
 
-def create_reports_tab(parent, clipboard_service, set_active_treeview, data_manager):
-    """Create reports tab"""
-    # Reports frame
-    reports_frame = ttk.LabelFrame(parent, text="Отчеты", padding="10")
-    reports_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-    
-    # Report buttons
-    buttons_frame = ttk.Frame(reports_frame)
-    buttons_frame.pack(fill=tk.X, pady=(0, 20))
-    
-    def generate_revenue_report():
-        messagebox.showinfo("Отчет", "Отчет по доходам")
-    
-    def generate_attendance_report():
-        messagebox.showinfo("Отчет", "Отчет по посещаемости")
-    
-    def generate_students_report():
-        messagebox.showinfo("Отчет", "Отчет по ученикам")
-    
-    def generate_belt_progress_report():
-        messagebox.showinfo("Отчет", "Отчет по прогрессу поясов")
-    
-    ttk.Button(buttons_frame, text="💰 Доходы", command=generate_revenue_report).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="📊 Посещаемость", command=generate_attendance_report).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="👥 Ученики", command=generate_students_report).pack(side=tk.LEFT, padx=5)
-    ttk.Button(buttons_frame, text="🥋 Пояса", command=generate_belt_progress_report).pack(side=tk.LEFT, padx=5)
-    
-    # Statistics frame
-    stats_frame = ttk.LabelFrame(reports_frame, text="Общая статистика", padding="10")
-    stats_frame.pack(fill=tk.BOTH, expand=True)
-    
-    stats_text = tk.Text(stats_frame, height=15, wrap=tk.WORD)
-    stats_text.pack(fill=tk.BOTH, expand=True)
-    
-    # Sample statistics
-    try:
-        students_count = len(data_manager.load_students_data())
-        trainings_count = len(data_manager.load_trainings_data())
-        payments_count = len(data_manager.load_payments_data())
-        
-        stats_content = f"""
+# Statistics panel text (sample figures apart from the row counts)
+STATS_TEMPLATE = """
 📊 ОБЩАЯ СТАТИСТИКА АКАДЕМИИ BJJ
 
 👥 УЧЕНИКИ:
-• Всего учеников: {students_count}
-• Активных учеников: {students_count}
+• Всего учеников: {students}
+• Активных учеников: {students}
 • Новых за месяц: 2
 
 🥋 ПОЯСА:
@@ -808,7 +936,7 @@ def create_reports_tab(parent, clipboard_service, set_active_treeview, data_mana
 • Конверсия: 80%
 
 📅 ТРЕНИРОВКИ:
-• Проведено тренировок: {trainings_count}
+• Проведено тренировок: {trainings}
 • Средняя посещаемость: 7 человек
 • Загруженность: 70%
 
@@ -816,15 +944,88 @@ def create_reports_tab(parent, clipboard_service, set_active_treeview, data_mana
 • Рост учеников: +40% за месяц
 • Рост доходов: +25% за месяц
 • Удержание: 100%
-        """
-    except Exception as e:
-        stats_content = f"Ошибка загрузки статистики: {e}"
+""".strip()
+
+
+def create_reports_tab(parent, clipboard_service, set_active_treeview, data_manager):
+    """Create reports tab"""
+    # Reports frame
+    reports_frame = ttk.LabelFrame(parent, text="Отчеты", padding="10")
+    reports_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+    
+    # Report buttons
+    buttons_frame = ttk.Frame(reports_frame)
+    buttons_frame.pack(fill=tk.X, pady=(0, 20))
+    
+    ttk.Button(buttons_frame, text="💰 Доходы",
+               command=partial(messagebox.showinfo, "Отчет", "Отчет по доходам")).pack(side=tk.LEFT, padx=5)
+    ttk.Button(buttons_frame, text="📊 Посещаемость",
+               command=partial(messagebox.showinfo, "Отчет", "Отчет по посещаемости")).pack(side=tk.LEFT, padx=5)
+    ttk.Button(buttons_frame, text="👥 Ученики",
+               command=partial(messagebox.showinfo, "Отчет", "Отчет по ученикам")).pack(side=tk.LEFT, padx=5)
+    ttk.Button(buttons_frame, text="🥋 Пояса",
+               command=partial(messagebox.showinfo, "Отчет", "Отчет по прогрессу поясов")).pack(side=tk.LEFT, padx=5)
+    
+    # Statistics frame
+    stats_frame = ttk.LabelFrame(reports_frame, text="Общая статистика", padding="10")
+    stats_frame.pack(fill=tk.BOTH, expand=True)
+    
+    stats_text = tk.Text(stats_frame, height=15, wrap=tk.WORD)
+    stats_text.pack(fill=tk.BOTH, expand=True)
+    
+    def show_statistics(counts):
+        """Fill the statistics panel"""
+        students_count, trainings_count = counts
+        
+        stats_content = STATS_TEMPLATE.format(students=students_count, trainings=trainings_count)
+        
+        stats_text.config(state=tk.NORMAL)
+        stats_text.delete("1.0", tk.END)
+        stats_text.insert(tk.END, stats_content)
+        stats_text.config(state=tk.DISABLED)
     
-    stats_text.insert(tk.END, stats_content.strip())
+    stats_text.insert(tk.END, LOADING_ROW[0])
     stats_text.config(state=tk.DISABLED)
+    run_in_background(stats_text, data_manager, data_manager.count_rows, show_statistics)
+
+
+# Settings form rows by section: (label, default value, entry width)
+SETTINGS_SPEC = {
+    'academy': (
+        ("Название:", "JJ University", 40),
+        ("Адрес:", "ул. Примерная, 123", 40),
+    ),
+    'schedule': (
+        ("Дни недели:", "Понедельник, Среда, Пятница", 40),
+        ("Время:", "20:30", 40),
+    ),
+    'pricing': (
+        ("Месячный абонемент:", "8000", 20),
+        ("Разовое занятие:", "1500", 20),
+    ),
+    'telegram': (
+        ("Bot Token:", "1234567890:ABCdefGHIjklMNOpqrsTUVwxyz", 50),
+        ("Chat ID:", "-1001234567890", 50),
+    ),
+    'database': (
+        ("URL базы данных:", "sqlite:///bjj_crm.db", 50),
+    ),
+}
+
+
+def build_form(parent, spec):
+    """Grid label/entry rows from (label, default, width) tuples and return the entries by label"""
+    entries = {}
+    for row, (label, default, width) in enumerate(spec):
+        ttk.Label(parent, text=label).grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
+        entry = ttk.Entry(parent, width=width)
+        entry.grid(row=row, column=1, padx=5, pady=5)
+        entry.insert(0, default)
+        entries[label] = entry
+    return entries
 
 
-def create_settings_tab(parent):
+def create_settings_tab(parent, data_manager):
     """Create settings tab"""
     # Settings notebook
     settings_notebook = ttk.Notebook(parent)
@@ -838,43 +1039,19 @@ def create_settings_tab(parent):
     academy_frame = ttk.LabelFrame(general_frame, text="Информация об академии", padding="10")
     academy_frame.pack(fill=tk.X, padx=5, pady=5)
     
-    ttk.Label(academy_frame, text="Название:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-    academy_name_entry = ttk.Entry(academy_frame, width=40)
-    academy_name_entry.grid(row=0, column=1, padx=5, pady=5)
-    academy_name_entry.insert(0, "JJ University")
-    
-    ttk.Label(academy_frame, text="Адрес:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-    academy_address_entry = ttk.Entry(academy_frame, width=40)
-    academy_address_entry.grid(row=1, column=1, padx=5, pady=5)
-    academy_address_entry.insert(0, "ул. Примерная, 123")
+    settings_entries = build_form(academy_frame, SETTINGS_SPEC['academy'])
     
     # Schedule settings
     schedule_frame = ttk.LabelFrame(general_frame, text="Расписание", padding="10")
     schedule_frame.pack(fill=tk.X, padx=5, pady=5)
     
-    ttk.Label(schedule_frame, text="Дни недели:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-    days_entry = ttk.Entry(schedule_frame, width=40)
-    days_entry.grid(row=0, column=1, padx=5, pady=5)
-    days_entry.insert(0, "Понедельник, Среда, Пятница")
-    
-    ttk.Label(schedule_frame, text="Время:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-    time_entry = ttk.Entry(schedule_frame, width=40)
-    time_entry.grid(row=1, column=1, padx=5, pady=5)
-    time_entry.insert(0, "20:30")
+    settings_entries.update(build_form(schedule_frame, SETTINGS_SPEC['schedule']))
     
     # Pricing settings
     pricing_frame = ttk.LabelFrame(general_frame, text="Ценообразование", padding="10")
     pricing_frame.pack(fill=tk.X, padx=5, pady=5)
     
-    ttk.Label(pricing_frame, text="Месячный абонемент:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-    monthly_price_entry = ttk.Entry(pricing_frame, width=20)
-    monthly_price_entry.grid(row=0, column=1, padx=5, pady=5)
-    monthly_price_entry.insert(0, "8000")
-    
-    ttk.Label(pricing_frame, text="Разовое занятие:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-    single_price_entry = ttk.Entry(pricing_frame, width=20)
-    single_price_entry.grid(row=1, column=1, padx=5, pady=5)
-    single_price_entry.insert(0, "1500")
+    settings_entries.update(build_form(pricing_frame, SETTINGS_SPEC['pricing']))
     
     # Telegram settings
     telegram_frame = ttk.Frame(settings_notebook)
@@ -883,15 +1060,7 @@ def create_settings_tab(parent):
     telegram_settings_frame = ttk.LabelFrame(telegram_frame, text="Настройки Telegram", padding="10")
     telegram_settings_frame.pack(fill=tk.X, padx=5, pady=5)
     
-    ttk.Label(telegram_settings_frame, text="Bot Token:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-    bot_token_entry = ttk.Entry(telegram_settings_frame, width=50)
-    bot_token_entry.grid(row=0, column=1, padx=5, pady=5)
-    bot_token_entry.insert(0, "1234567890:ABCdefGHIjklMNOpqrsTUVwxyz")
-    
-    ttk.Label(telegram_settings_frame, text="Chat ID:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
-    chat_id_entry = ttk.Entry(telegram_settings_frame, width=50)
-    chat_id_entry.grid(row=1, column=1, padx=5, pady=5)
-    chat_id_entry.insert(0, "-1001234567890")
+    settings_entries.update(build_form(telegram_settings_frame, SETTINGS_SPEC['telegram']))
     
     # Notification settings
     notification_frame = ttk.LabelFrame(telegram_frame, text="Уведомления", padding="10")
@@ -904,10 +1073,8 @@ def create_settings_tab(parent):
     attendance_check.pack(anchor=tk.W, padx=5, pady=5)
     
     # Test Telegram button
-    def test_telegram():
-        messagebox.showinfo("Telegram", "Тест Telegram бота")
-    
-    ttk.Button(telegram_frame, text="🧪 Тест Telegram", command=test_telegram).pack(pady=10)
+    ttk.Button(telegram_frame, text="🧪 Тест Telegram",
+               command=partial(messagebox.showinfo, "Telegram", "Тест Telegram бота")).pack(pady=10)
     
     # Database settings
     database_frame = ttk.Frame(settings_notebook)
@@ -916,219 +1083,153 @@ def create_settings_tab(parent):
     database_settings_frame = ttk.LabelFrame(database_frame, text="Настройки базы данных", padding="10")
     database_settings_frame.pack(fill=tk.X, padx=5, pady=5)
     
-    ttk.Label(database_settings_frame, text="URL базы данных:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
-    db_url_entry = ttk.Entry(database_settings_frame, width=50)
-    db_url_entry.grid(row=0, column=1, padx=5, pady=5)
-    db_url_entry.insert(0, "sqlite:///bjj_crm.db")
+    settings_entries.update(build_form(database_settings_frame, SETTINGS_SPEC['database']))
     
     # Backup buttons
     backup_frame = ttk.LabelFrame(database_frame, text="Резервное копирование", padding="10")
     backup_frame.pack(fill=tk.X, padx=5, pady=5)
     
-    def backup_database():
-        try:
-            backup_service = BackupService()
-            backup_path = backup_service.create_backup(include_files=False)
-            messagebox.showinfo("✅ Успех", f"База данных скопирована:\n{backup_path}")
-        except Exception as e:
-            messagebox.showerror("❌ Ошибка", f"Ошибка резервного копирования: {e}")
-    
-    def restore_database():
-        messagebox.showinfo("Информация", "Функция восстановления базы данных")
+    backup_database = partial(start_backup, parent, data_manager,
+                              "База данных скопирована", "Ошибка резервного копирования")
+    restore_database = partial(messagebox.showinfo, "Информация", "Функция восстановления базы данных")
     
     ttk.Button(backup_frame, text="💾 Создать бэкап", command=backup_database).pack(side=tk.LEFT, padx=5)
     ttk.Button(backup_frame, text="🔄 Восстановить", command=restore_database).pack(side=tk.LEFT, padx=5)
     
     # Save settings button
-    def save_settings():
-        messagebox.showinfo("Настройки", "Настройки сохранены!")
-    
-    ttk.Button(database_frame, text="💾 Сохранить настройки", command=save_settings).pack(pady=10)
+    ttk.Button(database_frame, text="💾 Сохранить настройки",
+               command=partial(messagebox.showinfo, "Настройки", "Настройки сохранены!")).pack(pady=10)
+
 
+# Student form fields: (label, Student attribute, whether the field must be filled in)
+STUDENT_FORM_FIELDS = (
+    ("Имя", "first_name", True),
+    ("Фамилия", "last_name", True),
+    ("Телефон", "phone", True),
+    ("Telegram", "telegram_id", False),
+)
 
-def show_add_student_dialog(parent, data_manager, refresh_callback):
-    """Show add student dialog"""
+# Student form dialog widgets, built on first open and hidden between uses
+_student_dialog = None
+
+
+def _hide_dialog(dialog):
+    """Hide a reusable dialog"""
+    dialog.grab_release()
+    dialog.withdraw()
+
+
+def _build_student_dialog(parent):
+    """Build the hidden student form dialog and return its widgets"""
     dialog = tk.Toplevel(parent)
-    dialog.title("Добавить ученика")
-    dialog.geometry("400x300")
+    dialog.withdraw()
     dialog.transient(parent)
-    dialog.grab_set()
     
     # Center dialog
-    dialog.update_idletasks()
-    x = (dialog.winfo_screenwidth() // 2) - (400 // 2)
-    y = (dialog.winfo_screenheight() // 2) - (300 // 2)
-    dialog.geometry(f"400x300+{x}+{y}")
+    dialog.geometry(center_geometry(400, 300))
     
-    # Form fields
-    ttk.Label(dialog, text="Имя:").pack(pady=5)
-    name_entry = ttk.Entry(dialog, width=30)
-    name_entry.pack(pady=5)
+    form = {'dialog': dialog}
+    required = {}
     
-    ttk.Label(dialog, text="Фамилия:").pack(pady=5)
-    surname_entry = ttk.Entry(dialog, width=30)
-    surname_entry.pack(pady=5)
+    def validate_required(widget_name, proposed):
+        """Enable saving only while every required field has text; never rejects the edit"""
+        filled = all(
+            (proposed if name == widget_name else entry.get()).strip()
+            for name, entry in required.items()
+        )
+        form['save'].state(['!disabled'] if filled else ['disabled'])
+        return True
     
-    ttk.Label(dialog, text="Телефон:").pack(pady=5)
-    phone_entry = ttk.Entry(dialog, width=30)
-    phone_entry.pack(pady=5)
+    # One Tcl command shared by the required entries, run on every edit (typing, paste, prefill)
+    vcmd = (dialog.register(validate_required), '%W', '%P')
     
-    ttk.Label(dialog, text="Telegram:").pack(pady=5)
-    telegram_entry = ttk.Entry(dialog, width=30)
-    telegram_entry.pack(pady=5)
+    # Form fields
+    for label, attr, is_required in STUDENT_FORM_FIELDS:
+        ttk.Label(dialog, text=f"{label}:").pack(pady=5)
+        if is_required:
+            form[attr] = ttk.Entry(dialog, width=30, validate='key', validatecommand=vcmd)
+            required[str(form[attr])] = form[attr]
+        else:
+            form[attr] = ttk.Entry(dialog, width=30)
+        form[attr].pack(pady=5)
     
     ttk.Label(dialog, text="Пояс:").pack(pady=5)
-    belt_combo = ttk.Combobox(dialog, values=["White", "Blue", "Purple", "Brown", "Black"])
-    belt_combo.pack(pady=5)
-    belt_combo.set("White")
+    form['current_belt'] = ttk.Combobox(dialog, values=BELTS)
+    form['current_belt'].pack(pady=5)
     
-    def save_student():
-        try:
-            # Validate input
-            if not name_entry.get().strip():
-                messagebox.showerror("Ошибка", "Имя не может быть пустым")
-                return
-            if not surname_entry.get().strip():
-                messagebox.showerror("Ошибка", "Фамилия не может быть пустой")
-                return
-            if not phone_entry.get().strip():
-                messagebox.showerror("Ошибка", "Телефон не может быть пустым")
-                return
-            
-            # Create student in database
-            student = data_manager.student_controller.create_student(
-                first_name=name_entry.get().strip(),
-                last_name=surname_entry.get().strip(),
-                phone=phone_entry.get().strip(),
-                telegram_id=telegram_entry.get().strip() or None,
-                current_belt=belt_combo.get()
-            )
-            
-            messagebox.showinfo("Успех", f"Ученик {student.first_name} {student.last_name} добавлен!")
-            refresh_callback()
-            dialog.destroy()
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось добавить ученика: {e}")
-    
-    def cancel():
-        dialog.destroy()
-    
-    # Buttons
+    # Buttons; the save command is set on every open
     button_frame = ttk.Frame(dialog)
     button_frame.pack(pady=20)
     
-    ttk.Button(button_frame, text="Сохранить", command=save_student).pack(side=tk.LEFT, padx=10)
-    ttk.Button(button_frame, text="Отмена", command=cancel).pack(side=tk.LEFT, padx=10)
+    form['save'] = ttk.Button(button_frame, text="Сохранить", state='disabled')
+    form['save'].pack(side=tk.LEFT, padx=10)
+    hide = partial(_hide_dialog, dialog)
+    ttk.Button(button_frame, text="Отмена", command=hide).pack(side=tk.LEFT, padx=10)
+    dialog.protocol("WM_DELETE_WINDOW", hide)
+    
+    return form
 
 
-def show_edit_student_dialog(parent, student_data, data_manager, refresh_callback):
-    """Show edit student dialog"""
-    dialog = tk.Toplevel(parent)
-    dialog.title("Редактировать ученика")
-    dialog.geometry("400x300")
-    dialog.transient(parent)
-    dialog.grab_set()
-    
-    # Center dialog
-    dialog.update_idletasks()
-    x = (dialog.winfo_screenwidth() // 2) - (400 // 2)
-    y = (dialog.winfo_screenheight() // 2) - (300 // 2)
-    dialog.geometry(f"400x300+{x}+{y}")
-    
-    # Form fields with current data
-    ttk.Label(dialog, text="Имя:").pack(pady=5)
-    name_entry = ttk.Entry(dialog, width=30)
-    name_entry.pack(pady=5)
-    name_entry.insert(0, student_data[1])
-    
-    ttk.Label(dialog, text="Фамилия:").pack(pady=5)
-    surname_entry = ttk.Entry(dialog, width=30)
-    surname_entry.pack(pady=5)
-    surname_entry.insert(0, student_data[2])
-    
-    ttk.Label(dialog, text="Телефон:").pack(pady=5)
-    phone_entry = ttk.Entry(dialog, width=30)
-    phone_entry.pack(pady=5)
-    phone_entry.insert(0, student_data[3])
-    
-    ttk.Label(dialog, text="Telegram:").pack(pady=5)
-    telegram_entry = ttk.Entry(dialog, width=30)
-    telegram_entry.pack(pady=5)
-    telegram_entry.insert(0, student_data[4])
-    
-    ttk.Label(dialog, text="Пояс:").pack(pady=5)
-    belt_combo = ttk.Combobox(dialog, values=["White", "Blue", "Purple", "Brown", "Black"])
-    belt_combo.pack(pady=5)
-    belt_combo.set(student_data[5])
+def show_student_dialog(parent, data_manager, status_bar, refresh_callback, initial=None):
+    """Show add student dialog, or edit student dialog for the `initial` table row"""
+    global _student_dialog
+    form = _student_dialog
+    if form is None or not form['dialog'].winfo_exists():
+        form = _student_dialog = _build_student_dialog(parent)
+    dialog = form['dialog']
+    
+    # Form fields, with current data when editing
+    values = ("", "", "", "", BELTS[0]) if initial is None else initial[1:6]
+    for (_, attr, _), value in zip(STUDENT_FORM_FIELDS, values):
+        form[attr].delete(0, tk.END)
+        form[attr].insert(0, value)
+    form['current_belt'].set(values[4])
     
     def save_student():
         try:
-            # Validate input
-            if not name_entry.get().strip():
-                messagebox.showerror("Ошибка", "Имя не может быть пустым")
-                return
-            if not surname_entry.get().strip():
-                messagebox.showerror("Ошибка", "Фамилия не может быть пустой")
-                return
-            if not phone_entry.get().strip():
-                messagebox.showerror("Ошибка", "Телефон не может быть пустым")
-                return
+            # Required fields are checked as they are typed; the save button stays disabled until filled
+            fields = {attr: form[attr].get().strip() or None for _, attr, _ in STUDENT_FORM_FIELDS}
+            fields['current_belt'] = form['current_belt'].get()
             
-            # Update student in database
-            updated_student = data_manager.student_controller.update_student(
-                student_id=student_data[0],
-                first_name=name_entry.get().strip(),
-                last_name=surname_entry.get().strip(),
-                phone=phone_entry.get().strip(),
-                telegram_id=telegram_entry.get().strip() or None,
-                current_belt=belt_combo.get()
-            )
-            
-            if updated_student:
-                messagebox.showinfo("Успех", f"Ученик {updated_student.first_name} {updated_student.last_name} обновлен!")
-                refresh_callback()
-                dialog.destroy()
+            if initial is None:
+                # Create student in database
+                student = data_manager.create_student(**fields)
+                status_bar.show(f"✅ Ученик {student.first_name} {student.last_name} добавлен!")
             else:
-                messagebox.showerror("Ошибка", "Не удалось найти ученика для обновления")
+                # Update student in database
+                student = data_manager.update_student(initial[0], **fields)
+                if not student:
+                    messagebox.showerror("Ошибка", "Не удалось найти ученика для обновления")
+                    return
+                status_bar.show(f"✅ Ученик {student.first_name} {student.last_name} обновлен!")
+            
+            refresh_callback()
+            _hide_dialog(dialog)
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось обновить ученика: {e}")
-    
-    def cancel():
-        dialog.destroy()
-    
-    # Buttons
-    button_frame = ttk.Frame(dialog)
-    button_frame.pack(pady=20)
+            action = "добавить" if initial is None else "обновить"
+            messagebox.showerror("Ошибка", f"Не удалось {action} ученика: {e}")
     
-    ttk.Button(button_frame, text="Сохранить", command=save_student).pack(side=tk.LEFT, padx=10)
-    ttk.Button(button_frame, text="Отмена", command=cancel).pack(side=tk.LEFT, padx=10)
+    dialog.title("Добавить ученика" if initial is None else "Редактировать ученика")
+    form['save'].configure(command=save_student)
+    dialog.deiconify()
+    dialog.grab_set()
+    form['first_name'].focus_set()
 
 
-def show_student_details(parent, student_data):
-    """Show student details dialog"""
-    dialog = tk.Toplevel(parent)
-    dialog.title("Подробности ученика")
-    dialog.geometry("500x400")
-    dialog.transient(parent)
-    dialog.grab_set()
-    
-    # Center dialog
-    dialog.update_idletasks()
-    x = (dialog.winfo_screenwidth() // 2) - (500 // 2)
-    y = (dialog.winfo_screenheight() // 2) - (400 // 2)
-    dialog.geometry(f"500x400+{x}+{y}")
-    
-    # Student info
-    info_text = f"""
+# Names of the students table columns used by STUDENT_INFO_TEMPLATE
+STUDENT_INFO_FIELDS = ('id', 'first_name', 'last_name', 'phone', 'telegram', 'belt', 'registration_date')
+
+# Student details text, formatted with the table row values (sample statistics)
+STUDENT_INFO_TEMPLATE = """
 👤 ИНФОРМАЦИЯ ОБ УЧЕНИКЕ
 
-🆔 ID: {student_data[0]}
-👤 Имя: {student_data[1]}
-👤 Фамилия: {student_data[2]}
-📞 Телефон: {student_data[3]}
-💬 Telegram: {student_data[4]}
-🥋 Пояс: {student_data[5]}
-📅 Дата регистрации: {student_data[6]}
+🆔 ID: {id}
+👤 Имя: {first_name}
+👤 Фамилия: {last_name}
+📞 Телефон: {phone}
+💬 Telegram: {telegram}
+🥋 Пояс: {belt}
+📅 Дата регистрации: {registration_date}
 
 📊 СТАТИСТИКА:
 • Посещено тренировок: 15
@@ -1140,11 +1241,24 @@ def show_student_details(parent, student_data):
 • Последний платеж: 8000 руб. (2024-01-01)
 • Тип: Месячный абонемент
 • Статус: Оплачено
-    """
+""".strip()
+
+
+def show_student_details(parent, student_data):
+    """Show student details dialog"""
+    dialog = tk.Toplevel(parent)
+    dialog.title("Подробности ученика")
+    # Centered on screen
+    dialog.geometry(center_geometry(500, 400))
+    dialog.transient(parent)
+    dialog.grab_set()
+    
+    # Student info
+    info_text = STUDENT_INFO_TEMPLATE.format_map(dict(zip(STUDENT_INFO_FIELDS, student_data)))
     
     text_widget = tk.Text(dialog, wrap=tk.WORD, padx=20, pady=20)
     text_widget.pack(fill=tk.BOTH, expand=True)
-    text_widget.insert(tk.END, info_text.strip())
+    text_widget.insert(tk.END, info_text)
     text_widget.config(state=tk.DISABLED)
     
     # Close button
@@ -1153,22 +1267,25 @@ def show_student_details(parent, student_data):
 
 def main():
     """Main application entry point"""
+    # Configure logging; debug tracing stays disabled and costs a level check
+    logging.basicConfig(level=logging.WARNING)
+    
     # Create main window
     root = tk.Tk()
     root.title("BJJ CRM System - Система управления академией бразильского джиу-джитсу")
-    root.geometry("1200x800")
-    root.minsize(800, 600)
+    
+    # Screen size does not need a geometry pass, so read it once for all windows
+    global SCREEN_W, SCREEN_H
+    SCREEN_W, SCREEN_H = root.winfo_screenwidth(), root.winfo_screenheight()
     
     # Center window
-    root.update_idletasks()
-    x = (root.winfo_screenwidth() // 2) - (1200 // 2)
-    y = (root.winfo_screenheight() // 2) - (800 // 2)
-    root.geometry(f"1200x800+{x}+{y}")
+    root.geometry(center_geometry(1200, 800))
+    root.minsize(800, 600)
     
-    # Create database tables
+    # Create database tables (skipped once the current schema is in place)
     try:
-        create_tables()
-        print("✅ Database tables created successfully")
+        ensure_tables()
+        print("✅ Database tables are ready")
     except Exception as e:
         print(f"❌ Error creating database tables: {e}")
         messagebox.showerror("Ошибка базы данных", f"Не удалось создать таблицы базы данных:\n{e}")